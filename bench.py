@@ -0,0 +1,345 @@
+"""Micro-benchmarks for the enemy update pass, thief targeting, spawning,
+entity pooling, entity memory, boomerang hits at high speed, spawn
+placement, state snapshots and cold start with and without the asset
+bundle.
+
+Run from the repository root:  python bench.py
+"""
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import game
+
+ENEMY_COUNTS = [3, 10, 50, 100, 250, 500]
+ARRAY_COUNTS = [100, 500, 1000, 2000, 5000]
+FRAMES       = 120
+NUM_CHAIRS   = 50
+SPAWNS       = 2000
+PART_COUNTS  = [5, 50, 200]
+LAYOUTS      = 200
+STARTUP_RUNS = 5
+MEMORY_COUNT = 2000
+ARC_SPEEDS   = [0.015, 0.1, 0.25, 0.4]
+ARC_TARGETS  = 8
+PLACE_CROWDS = [0, 100, 500, 1000]
+PLACEMENTS   = 300
+SNAP_CROWDS  = [0, 100, 500, 1000]
+SNAPSHOTS    = 200
+
+
+def populate(num_enemies):
+    world = game.GameSession(num_enemies)
+    for e in list(world.enemies):
+        e.kill()
+    for _ in range(num_enemies):
+        e = game.Enemy((random.randint(50, game.WIDTH-50),
+                        random.randint(50, game.HEIGHT-50)))
+        world.enemies.add(e); world.all_sprites.add(e)
+    for _ in range(NUM_CHAIRS):
+        c = game.Chair(world, (random.randint(50, game.WIDTH-50),
+                               random.randint(50, game.HEIGHT-50)))
+        c.spawn_time = -game.CHAIR_INVINCIBILITY
+        world.chairs.add(c); world.all_sprites.add(c)
+    return world
+
+
+def bench_enemies(num_enemies, arrays=False):
+    random.seed(num_enemies)
+    world = populate(num_enemies)
+    world.enemy_arrays = game.EnemyArrays(world) if arrays else None
+    now = world.ticks()
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        world.collisions.begin()
+        world.update_enemies(now)
+    return (time.perf_counter() - start) / FRAMES
+
+
+def brute_nearest(world, thief):
+    candidates = [p for p in world.parts if p.forbidden_thief is not thief]
+    if not candidates:
+        return None
+    return min(candidates,
+               key=lambda p: (p.rect.centerx-thief.rect.centerx)**2
+                           + (p.rect.centery-thief.rect.centery)**2)
+
+
+def brute_overlapping(world, thief):
+    return [p for p in world.parts if p.forbidden_thief is not thief
+            and pygame.sprite.collide_mask(thief, p)]
+
+
+def bench_thief_targeting(num_parts):
+    """Check the indexed nearest-part and overlap queries against a linear
+    scan on random layouts and time both; returns (indexed s/query,
+    brute s/query)."""
+    random.seed(num_parts)
+    indexed = brute = 0.0
+    for _ in range(LAYOUTS):
+        world   = game.GameSession(random.randrange(2**32))
+        thieves = [game.Thief(world, (random.randint(0, game.WIDTH),
+                                      random.randint(0, game.HEIGHT)))
+                   for _ in range(5)]
+        for _ in range(num_parts):
+            # integer grid so equal-distance ties actually happen
+            p = game.Part(world, (random.randint(0, 32)*32,
+                                  random.randint(0, 24)*32))
+            p.forbidden_thief = random.choice(thieves + [None]*5)
+            world.parts.add(p)
+        for p in random.sample(world.parts.sprites(), num_parts//4):
+            p.kill()
+        world.collisions.begin()
+        for t in thieves:
+            start = time.perf_counter()
+            got = (world.parts.nearest(t.rect.center, t),
+                   {p for p in world.collisions.colliding(t, "parts")
+                    if p.forbidden_thief is not t})
+            mid = time.perf_counter()
+            want = (brute_nearest(world, t), set(brute_overlapping(world, t)))
+            brute += time.perf_counter() - mid
+            indexed += mid - start
+            assert got == want, (got, want)
+    queries = LAYOUTS * 5
+    return indexed / queries, brute / queries
+
+
+def bench_spawn(kind, shared):
+    """Time and allocation per spawn of `kind(pos)`; `shared=False` mimics
+    no asset cache."""
+    saved = game.asset_cache
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(SPAWNS):
+        if not shared:
+            game.asset_cache = game.AssetCache()
+        kind((100, 100))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    game.asset_cache = saved
+    return elapsed / SPAWNS, peak
+
+
+def bench_churn(world, group, make, pooled):
+    """Spawn-and-kill cycles through `group`, from its pool or with
+    `make(pos)`; returns (s/cycle, peak bytes)."""
+    target = getattr(world, group)
+    tracemalloc.start()
+    start  = time.perf_counter()
+    for i in range(SPAWNS):
+        pos = (100 + i % 50, 100)
+        if pooled:
+            s = world.spawn(group, pos)
+        else:
+            s = make(pos); target.add(s); world.all_sprites.add(s)
+        s.kill()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed / SPAWNS, peak
+
+
+def bench_memory(make):
+    """Bytes per entity built by `make(pos)` and filed in a kind group and
+    a draw group, against a pygame Sprite holding the same fields in two
+    pygame Groups (the layout before Entity)."""
+    kind, draw = game.EntityGroup(), game.EntityGroup(draw=True)
+    tracemalloc.start()
+    for i in range(MEMORY_COUNT):
+        e = make((50 + i % 900, 100))
+        kind.add(e); draw.add(e)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    entities = kind.sprites()
+    fields   = [n for cls in type(entities[0]).__mro__
+                for n in getattr(cls, "__slots__", ()) if not n.startswith("_")]
+    groups   = pygame.sprite.Group(), pygame.sprite.Group()
+    tracemalloc.start()
+    for e in entities:
+        s = pygame.sprite.Sprite()
+        for n in fields:
+            if hasattr(e, n):
+                setattr(s, n, getattr(e, n))
+        s.rect = e.rect.copy()
+        s.add(*groups)
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return before / MEMORY_COUNT, after / MEMORY_COUNT
+
+
+def bench_arc_hits(speed, swept):
+    """Enemies hit by one throw at `speed` with ARC_TARGETS of them spaced
+    along its arc, checking the stretch between ticks or only the points
+    reached (the old single-sample test)."""
+    world = game.GameSession(0)
+    for e in list(world.enemies):
+        e.kill()
+    saved, game.BOOMERANG_SPEED = game.BOOMERANG_SPEED, speed
+    proj = world.spawn("boomerang_projectiles", (200, 400), (700, 400))
+    game.BOOMERANG_SPEED = saved
+    # sample the same arc finely to place targets on it
+    fine = game.BoomerangProjectile(world, (200, 400), (700, 400)).path
+    for k in range(ARC_TARGETS):
+        world.spawn("enemies", fine[(k+1) * len(fine)//2 // (ARC_TARGETS+1)])
+    before = len(world.enemies)
+    world.collisions.begin()
+    if swept:
+        while proj.alive():
+            proj.update()
+    else:
+        for center in proj.path:
+            proj.rect.center = center
+            hit = world.collisions.first(proj, "enemies")
+            if hit:
+                hit.kill()
+    return before - len(world.enemies)
+
+
+def bench_placement(crowd):
+    """Placement.spot() for a new enemy among `crowd` enemies and the
+    chairs, rebuilding the occupancy grid each time as a fresh tick would;
+    returns (mean s, worst s, fallback share, share of plain random points
+    that would land on a sprite)."""
+    random.seed(crowd)
+    world  = populate(crowd)
+    place  = world.placement
+    solid  = [s.rect for name in place.SOLID for s in getattr(world, name)]
+    times  = []
+    for _ in range(PLACEMENTS):
+        place.invalidate()
+        start = time.perf_counter()
+        place.spot(away=world.player.rect.center, distance=game.SPAWN_SAFE_DIST)
+        times.append(time.perf_counter() - start)
+    blocked = sum(pygame.Rect(random.randint(50, game.WIDTH-50),
+                              random.randint(50, game.HEIGHT-50), 30, 30)
+                  .collidelist(solid) >= 0 for _ in range(PLACEMENTS))
+    return (sum(times) / len(times), max(times),
+            place.fallbacks / place.queries, blocked / PLACEMENTS)
+
+
+def bench_snapshot(crowd):
+    """snapshot_state() and restore_state() on a game the bot has played
+    for a minute, plus `crowd` extra enemies; returns (bytes, s/snapshot,
+    s/restore)."""
+    random.seed(crowd)
+    world = game.GameSession(crowd)
+    game.run_headless(world, 60000)
+    for _ in range(crowd):
+        world.spawn("enemies", (random.randint(50, game.WIDTH-50),
+                                random.randint(50, game.HEIGHT-50)))
+    start = time.perf_counter()
+    for _ in range(SNAPSHOTS):
+        data = game.snapshot_state(world)
+    taken = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(SNAPSHOTS):
+        game.restore_state(world, data)
+    restored = time.perf_counter() - start
+    return len(data), taken / SNAPSHOTS, restored / SNAPSHOTS
+
+
+def bench_startup(bundle):
+    """Median startup_ms phases and wall ms of `import game` in fresh
+    interpreters, loading from the bundle or from the PNGs."""
+    env  = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1",
+                JUNKYARD_NO_BUNDLE="0" if bundle else "1")
+    code = "import json, game; print(json.dumps(game.startup_ms))"
+    runs = []
+    for _ in range(STARTUP_RUNS):
+        start = time.perf_counter()
+        out   = subprocess.run([sys.executable, "-c", code], env=env, check=True,
+                               capture_output=True, text=True).stdout
+        row   = json.loads(out.splitlines()[-1])
+        row["wall"] = (time.perf_counter() - start) * 1000
+        runs.append(row)
+    assert all(r["source"] == ("bundle" if bundle else "png") for r in runs)
+    return {k: statistics.median(r[k] for r in runs)
+            for k in ("intro", "assets", "total", "wall")}
+
+
+def main():
+    print(f"{'enemies':>8} {'ms/frame':>10} {'us/enemy':>10}")
+    for n in ENEMY_COUNTS:
+        per_frame = bench_enemies(n)
+        print(f"{n:>8} {per_frame*1e3:>10.3f} {per_frame*1e6/n:>10.2f}")
+
+    if game.np is not None:
+        print(f"\n{'numpy':>8} {'ms/frame':>10} {'us/enemy':>10}")
+        for n in ARRAY_COUNTS:
+            per_frame = bench_enemies(n, arrays=True)
+            print(f"{n:>8} {per_frame*1e3:>10.3f} {per_frame*1e6/n:>10.2f}")
+
+    print(f"\n{'parts':>8} {'index us':>10} {'brute us':>10}")
+    for n in PART_COUNTS:
+        indexed, brute = bench_thief_targeting(n)
+        print(f"{n:>8} {indexed*1e6:>10.2f} {brute*1e6:>10.2f}")
+
+    print(f"\n{'spawn':>16} {'cache':>6} {'us/spawn':>10} {'peak KiB':>10}")
+    world  = game.GameSession(0)
+    kinds  = {"Chair": lambda pos: game.Chair(world, pos),
+              "Part":  lambda pos: game.Part(world, pos),
+              "Enemy": game.Enemy, "BoomerangItem": game.BoomerangItem}
+    for name, kind in kinds.items():
+        for shared in (False, True):
+            per_spawn, peak = bench_spawn(kind, shared)
+            print(f"{name:>16} {'on' if shared else 'off':>6} "
+                  f"{per_spawn*1e6:>10.2f} {peak/1024:>10.1f}")
+    print("asset cache:", game.asset_cache.stats())
+
+    print(f"\n{'churn':>16} {'pool':>6} {'us/cycle':>10} {'peak KiB':>10}")
+    for group, make in (("chairs", kinds["Chair"]), ("parts", kinds["Part"]),
+                        ("enemies", game.Enemy)):
+        for pooled in (False, True):
+            per_cycle, peak = bench_churn(world, group, make, pooled)
+            print(f"{group:>16} {'on' if pooled else 'off':>6} "
+                  f"{per_cycle*1e6:>10.2f} {peak/1024:>10.1f}")
+    print("pools:", {k: v["reused"] for k, v in world.pool_stats().items()})
+
+    print(f"\n{'memory':>16} {'sprite B':>10} {'entity B':>10}")
+    for name, make in (("Enemy", game.Enemy), ("Chair", kinds["Chair"]),
+                       ("Part", kinds["Part"]),
+                       ("Thief", lambda pos: game.Thief(world, pos))):
+        before, after = bench_memory(make)
+        print(f"{name:>16} {before:>10.0f} {after:>10.0f}")
+
+    print(f"\n{'arc speed':>10} {'ticks':>6} {'point hits':>11} {'swept hits':>11}")
+    for speed in ARC_SPEEDS:
+        ticks = len(game.boomerang_arc(speed))
+        print(f"{speed:>10.3f} {ticks:>6} {bench_arc_hits(speed, False):>11} "
+              f"{bench_arc_hits(speed, True):>11}")
+
+    print(f"\n{'crowd':>8} {'mean us':>10} {'worst us':>10} {'fallback':>9} "
+          f"{'random hits':>12}")
+    for crowd in PLACE_CROWDS:
+        mean, worst, fallback, blocked = bench_placement(crowd)
+        print(f"{crowd:>8} {mean*1e6:>10.1f} {worst*1e6:>10.1f} {fallback:>9.1%} "
+              f"{blocked:>12.1%}")
+
+    print(f"\n{'snapshot':>14} {'bytes':>8} {'save us':>10} {'restore us':>11}")
+    for crowd in SNAP_CROWDS:
+        size, taken, restored = bench_snapshot(crowd)
+        print(f"{f'+{crowd} enemies':>14} {size:>8} {taken*1e6:>10.1f} "
+              f"{restored*1e6:>11.1f}")
+
+    if game.load_asset_bundle() is None:
+        game.write_asset_bundle()
+    print(f"\n{'startup':>8} {'intro ms':>10} {'assets ms':>10} {'init ms':>10} "
+          f"{'wall ms':>10}")
+    for bundle in (False, True):
+        t = bench_startup(bundle)
+        print(f"{'bundle' if bundle else 'png':>8} {t['intro']:>10.1f} "
+              f"{t['assets']:>10.1f} {t['total']:>10.1f} {t['wall']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
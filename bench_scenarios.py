@@ -0,0 +1,184 @@
+"""Scenario benchmarks for the game loop.
+
+Builds synthetic worlds, steps update() and then, separately, the render
+pass for a fixed number of frames, and reports per-phase frame times as
+JSON. Pass --baseline to compare against a saved run; the exit status is
+non-zero when any scenario regresses past --tolerance.
+
+Run from the repository root:
+    python bench_scenarios.py --out results.json
+    python bench_scenarios.py --baseline results.json
+"""
+import argparse
+import collections
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import game
+
+SCENARIOS = {
+    "idle":          dict(enemies=3,    chairs=0,  thieves=1,  boss=False, boomerang=False),
+    "enemies_10":    dict(enemies=10,   chairs=50, thieves=20, boss=True,  boomerang=True),
+    "enemies_100":   dict(enemies=100,  chairs=50, thieves=20, boss=True,  boomerang=True),
+    "enemies_1000":  dict(enemies=1000, chairs=50, thieves=20, boss=True,  boomerang=True),
+    "chairs_500":    dict(enemies=10,   chairs=500, thieves=1, boss=False, boomerang=False),
+    "thieves_100":   dict(enemies=3,    chairs=0,  thieves=100, boss=False, boomerang=False),
+}
+FRAMES      = 300
+PERCENTILES = (50, 95, 99)
+
+
+def build_world(spec, seed):
+    """A fresh session on a SimClock, populated per `spec`."""
+    layout = random.Random(seed)
+    world  = game.GameSession(seed)
+
+    def spot():
+        while True:
+            x = layout.randint(50, game.WIDTH-50)
+            y = layout.randint(50, game.HEIGHT-50)
+            if abs(x - game.WIDTH//2) > 150 or abs(y - game.HEIGHT//2) > 150:
+                return x, y
+
+    for e in list(world.enemies) + list(world.thieves):
+        e.kill()
+    for _ in range(spec["enemies"]):
+        e = game.Enemy(spot()); world.enemies.add(e); world.all_sprites.add(e)
+    for _ in range(spec["thieves"]):
+        t = game.Thief(world, spot()); world.thieves.add(t); world.all_sprites.add(t)
+    for _ in range(spec["chairs"]):
+        c = game.Chair(world, spot()); world.chairs.add(c); world.all_sprites.add(c)
+    if spec["boss"]:
+        world.spawn_boss(world.ticks())
+    return world
+
+
+def step_frames(world, spec, frames):
+    """Run update() for `frames` frames; the player can't die so the world
+    keeps its load, and the boomerang is re-thrown whenever it returns."""
+    player = world.player
+    for _ in range(frames):
+        now = world.clock.advance()
+        game.profiler.begin_frame()
+        keys, aim, throw = game.bot_policy(world, now)
+        if spec["boomerang"]:
+            player.has_boomerang = True
+            throw = True
+            aim   = (game.WIDTH - player.rect.centerx,
+                     game.HEIGHT - player.rect.centery)
+        game.profiler.lap("events")
+        world.update(now, keys, aim, throw)
+        game.profiler.end_frame(world)
+        world.game_over = False
+
+
+def render_frames(world, frames):
+    now   = world.ticks()
+    times = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        game.render(world, now)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def summarize(values):
+    values = sorted(values)
+    stats  = {"mean": sum(values) / len(values)}
+    for q in PERCENTILES:
+        stats[f"p{q}"] = values[min(len(values)-1, len(values)*q // 100)]
+    return stats
+
+
+def run_scenario(name, frames, seed, numpy_enemies=False):
+    spec  = SCENARIOS[name]
+    world = build_world(spec, seed)
+    if numpy_enemies:
+        world.enemy_arrays = game.EnemyArrays(world)
+    game.profiler.frames  = collections.deque(maxlen=frames)
+    game.profiler.enabled = True
+    step_frames(world, spec, frames)
+    rows = list(game.profiler.frames)
+    game.profiler.enabled = False
+
+    phases = [p for p in game.profiler.PHASES if p != "render"]
+    result = {p: summarize([r[p] for r in rows]) for p in phases}
+    result["update"] = summarize([r["total"] for r in rows])
+    result["render"] = summarize(render_frames(world, frames))
+    result["entities"] = {c: rows[-1]["n_" + c] for c in game.profiler.COUNTS}
+    return result
+
+
+def compare(results, baseline, tolerance):
+    """Print p50 ratios against `baseline`; returns the regressed keys."""
+    regressions = []
+    print(f"{'scenario':<14}{'part':<8}{'base ms':>10}{'now ms':>10}{'ratio':>8}")
+    for name, res in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        for part in ("update", "render"):
+            old, new = base[part]["p50"], res[part]["p50"]
+            ratio = new / old if old else 1.0
+            flag  = "  REGRESSED" if ratio > 1 + tolerance else ""
+            print(f"{name:<14}{part:<8}{old:>10.3f}{new:>10.3f}{ratio:>8.2f}{flag}")
+            if flag:
+                regressions.append(f"{name}.{part}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenarios", nargs="*", default=list(SCENARIOS),
+                        help="scenarios to run (default: all)")
+    parser.add_argument("--frames", type=int, default=FRAMES)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--numpy-enemies", action="store_true")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare against this results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="allowed p50 slowdown before failing (0.15 = 15%%)")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = {
+        "meta": {"frames": args.frames, "seed": args.seed,
+                 "python": platform.python_version(),
+                 "pygame": pygame.version.ver,
+                 "numpy_enemies": args.numpy_enemies},
+        "scenarios": {},
+    }
+    for name in args.scenarios:
+        res = run_scenario(name, args.frames, args.seed, args.numpy_enemies)
+        results["scenarios"][name] = res
+        print(f"{name:<14} update p50 {res['update']['p50']:7.3f} ms  "
+              f"p99 {res['update']['p99']:7.3f} ms  "
+              f"render p50 {res['render']['p50']:7.3f} ms", file=sys.stderr)
+
+    if args.out:
+        with open(args.out, "w") as fh:
+            json.dump(results, fh, indent=1)
+    else:
+        json.dump(results, sys.stdout, indent=1)
+        print()
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("regressions:", ", ".join(regressions), file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Equivalence check for the indexed spatial queries.
+
+Compares PartGroup.nearest() and the Collisions broadphase (overlapping(),
+colliding() and first()) with a brute-force scan of every pair on seeded
+random layouts: empty groups, sizes either side of the scan cut-offs,
+equal-distance ties, sprites centred on and next to cell boundaries, and
+groups that changed after they were filed. Takes a few seconds; the exit
+status is non-zero on any mismatch.
+
+Run from the repository root:
+    python check_queries.py
+    python check_queries.py --layouts 500 --seed 7
+"""
+import argparse
+import os
+import random
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import game
+
+LAYOUTS = 60
+SIZES   = sorted({0, 1, game.PART_INDEX_MIN - 1, game.PART_INDEX_MIN,
+                  game.COLLIDE_SCAN_MAX - 1, game.COLLIDE_SCAN_MAX, 60, 200})
+ASKERS  = 6
+CELL    = max(game.PART_INDEX_CELL, game.COLLIDE_CELL)
+SHOWN   = 10     # mismatches printed
+
+
+def point(rnd, mode):
+    """A position: anywhere, on a coarse grid (distance ties), or on or
+    one pixel either side of a cell boundary."""
+    if mode == "grid":
+        return rnd.randint(0, game.WIDTH//32)*32, rnd.randint(0, game.HEIGHT//32)*32
+    if mode == "boundary":
+        return (rnd.randint(0, game.WIDTH//CELL)*CELL + rnd.choice((-1, 0, 1)),
+                rnd.randint(0, game.HEIGHT//CELL)*CELL + rnd.choice((-1, 0, 1)))
+    return rnd.randint(0, game.WIDTH), rnd.randint(0, game.HEIGHT)
+
+
+def brute_nearest(parts, pos, thief):
+    x, y = pos
+    return min((p for p in parts if p.forbidden_thief is not thief),
+               key=lambda p: (p.rect.centerx-x)**2 + (p.rect.centery-y)**2,
+               default=None)
+
+
+def brute_overlapping(sprite, group):
+    return {s for s in group if s is not sprite and sprite.rect.colliderect(s.rect)}
+
+
+def brute_colliding(sprite, group, coarse):
+    return {s for s in brute_overlapping(sprite, group)
+            if coarse or pygame.sprite.collide_mask(sprite, s)}
+
+
+def check_layout(rnd, size, mode):
+    """Mismatch descriptions for one layout of `size` parts, chairs and
+    enemies."""
+    world = game.GameSession(rnd.randrange(2**32))
+    world.empty_groups()
+    thieves = []
+    for _ in range(ASKERS):
+        t = game.Thief(world, point(rnd, mode))
+        world.thieves.add(t)
+        thieves.append(t)
+    for _ in range(size):
+        p = world.spawn("parts", point(rnd, mode))
+        p.forbidden_thief = rnd.choice(thieves + [None]*ASKERS)
+        world.spawn("chairs", point(rnd, mode))
+        world.spawn("enemies", point(rnd, mode))
+    for name in ("parts", "chairs", "enemies"):
+        group = getattr(world, name)
+        for s in rnd.sample(group.sprites(), len(group)//4):
+            s.kill()
+
+    errors = []
+    collisions = world.collisions
+
+    def compare(label, sprite, name):
+        group = getattr(world, name)
+        got   = collisions.overlapping(sprite, name)
+        if set(got) != brute_overlapping(sprite, group) or len(got) != len(set(got)):
+            errors.append(f"{label}: overlapping {name}")
+        want = brute_colliding(sprite, group, collisions.coarse)
+        if set(collisions.colliding(sprite, name)) != want:
+            errors.append(f"{label}: colliding {name}")
+        first = collisions.first(sprite, name)
+        if (first is None) != (not want) or (first is not None and first not in want):
+            errors.append(f"{label}: first {name}")
+
+    for coarse in (False, True):
+        collisions.coarse = coarse
+        collisions.begin()
+        for i, t in enumerate(thieves):
+            label = f"size {size} {mode} coarse={coarse} thief {i}"
+            got   = world.parts.nearest(t.rect.center, t)
+            if got is not brute_nearest(world.parts, t.rect.center, t):
+                errors.append(f"{label}: nearest part")
+            compare(label, t, "parts")
+            compare(label, t, "chairs")
+            compare(label, t, "enemies")
+
+        # sprites added after the grids were filed, and moved ones refiled
+        for _ in range(3):
+            world.spawn("chairs", point(rnd, mode))
+            world.spawn("parts", point(rnd, mode))
+        for e in world.enemies:
+            e.rect.move_ip(rnd.randint(-40, 40), rnd.randint(-40, 40))
+        collisions.refile("enemies")
+        for i, t in enumerate(thieves):
+            label = f"size {size} {mode} coarse={coarse} thief {i} after changes"
+            if world.parts.nearest(t.rect.center, t) is not brute_nearest(
+                    world.parts, t.rect.center, t):
+                errors.append(f"{label}: nearest part")
+            compare(label, t, "parts")
+            compare(label, t, "chairs")
+            compare(label, t, "enemies")
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--layouts", type=int, default=LAYOUTS,
+                        help="layouts per group size")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rnd    = random.Random(args.seed)
+    errors = []
+    for size in SIZES:
+        for k in range(args.layouts):
+            errors += check_layout(rnd, size, ("random", "grid", "boundary")[k % 3])
+    checked = len(SIZES) * args.layouts
+    for e in errors[:SHOWN]:
+        print(e, file=sys.stderr)
+    print(f"{checked} layouts, {len(errors)} mismatches", file=sys.stderr)
+    sys.exit(bool(errors))
+
+
+if __name__ == "__main__":
+    main()
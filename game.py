@@ -1,11 +1,40 @@
+import argparse
+import collections
+import csv
+import functools
+import hashlib
+import heapq
+import itertools
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+
+# Headless mode runs game logic only, with no window and no rendering pass
+HEADLESS = "--headless" in sys.argv or os.environ.get("JUNKYARD_HEADLESS") == "1"
+if HEADLESS:
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+
 import pygame
 import random
-import sys
 import math
 
+try:
+    import numpy as np
+except ImportError:  # the arrays enemy backend is optional
+    np = None
+
 # ─── Configuration ───────────────────────────────────────────────────────────
 WIDTH, HEIGHT                = 1024, 768
-FPS                          = 60
+TICK_RATE                    = 60    # simulation ticks per second; speeds are per tick
+TICK_MS                      = 1000 / TICK_RATE
+MAX_CATCHUP_TICKS            = 5     # ticks per rendered frame before time is dropped
+RENDER_FPS                   = 120   # render rate cap; 0 leaves it uncapped
+INTERP_SNAP                  = 48    # px; longer moves in one tick aren't smoothed
 
 NUM_PARTS                    = 5
 NUM_ENEMIES                  = 3
@@ -24,6 +53,25 @@ LINE_PROBABILITY   = 0.1
 WAIT_TIME          = 1200
 COME_BACK_DELAY    = 5000
 
+# Thief targeting
+PART_INDEX_CELL  = 64    # px per cell in the part index
+PART_INDEX_MIN   = 16    # below this many parts a linear scan is cheaper
+
+# Collision broadphase
+COLLIDE_CELL     = 64    # px per broadphase cell
+COLLIDE_SCAN_MAX = 16    # groups smaller than this are simply scanned
+
+# Enemy pathing
+FLOW_CELL        = 32    # px per flow-field cell
+FLOW_SLACK       = 1     # cells the player may stray before re-routing
+
+# Spawn placement
+SPAWN_SPACING    = 24    # px between the Poisson-disk spawn candidates
+SPAWN_CELL       = 16    # px per occupancy cell
+SPAWN_CLEARANCE  = 20    # px kept clear around solid sprites
+SPAWN_TRIES      = 64    # candidates a query examines at most
+SPAWN_SAFE_DIST  = 150   # px between the player and a new enemy
+
 # Chair drop settings
 CHAIR_DROP_INTERVAL   = 10000
 CHAIR_DROP_CHANCE     = 0.5
@@ -37,7 +85,7 @@ CHAIR_GLOW_COLOR      = (255, 255, 0, 100)
 BOOMERANG_SPAWN_INTERVAL = 20000
 BOOMERANG_SPAWN_CHANCE   = 0.3
 BOOMERANG_RESPAWN_DELAY  = 10000
-BOOMERANG_SPEED          = 0.015
+BOOMERANG_SPEED          = 0.015   # arc parameter t per tick, out to 1 and back
 
 # Speed-boost settings
 SPEEDBOOST_SPAWN_INTERVAL = 30000
@@ -49,13 +97,34 @@ SPEEDBOOST_MULTIPLIER     = 2.0
 BOSS_SPAWN_COUNT       = 10       # every 10 deliveries
 WARNING_DURATION       = 1000    # ms of "SUPER BOOMER!" warning
 BOSS_CHARGE_TIME       = 3000    # ms to charge before sprint
-BOSS_SPRINT_SPEED      = 10      # px per frame
+BOSS_SPRINT_SPEED      = 10      # px per tick
 BOSS_PURSUIT_SPEED     = 1
 BOSS_CHAIR_INTERVAL    = 2000    # ms between boss chair throws
 BOSS_HIT_POINTS        = 5       # hits to kill boss
 BOSS_STOP_DURATION     = 2000    # ms to charge up sprint
 BOSS_SPRINT_DURATION   = 1000    # ms to sprint toward player
 
+# Dirty-rect rendering
+DIRTY_FULL_REDRAW_FRACTION = 0.35  # redraw whole screen past this dirty share
+
+# Quality governor
+QUALITY_BUDGET_MS  = 1000 / TICK_RATE  # mean frame work time to stay under
+QUALITY_WINDOW     = 30    # frames averaged per decision
+QUALITY_HEADROOM   = 0.6   # step back up below this share of the budget
+QUALITY_HOLD       = 120   # frames after a change before stepping up again
+
+# Frame profiler
+PROFILE_HISTORY          = 600   # frames kept in the ring buffer
+PROFILE_OVERLAY_REFRESH  = 30    # frames between overlay text rebuilds
+PROFILE_DUMP_PATH        = "frame_profile.csv"
+
+# Input recording
+REPLAY_DIGEST_INTERVAL   = 60    # frames between state digests
+
+# Asset bundle
+ASSET_BUNDLE_PATH  = "assets/bundle.bin"   # built by `game.py --build-assets`
+ATLAS_WIDTH        = 512                   # px per atlas shelf
+
 # Colors
 BG_COLOR         = (50, 50, 50)
 TEXT_COLOR       = (255, 255, 255)
@@ -64,13 +133,97 @@ BOSS_BAR_BG      = (100, 0, 0)
 BOSS_BAR_FILL    = (255, 0, 0)
 # ─────────────────────────────────────────────────────────────────────────────
 
+startup_start = time.perf_counter()
 pygame.init()
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
 clock  = pygame.time.Clock()
 font   = pygame.font.SysFont(None, 36)
+profile_font = pygame.font.SysFont("monospace", 14)
+
+# ─── Game Clock ───────────────────────────────────────────────────────────────
+class SimClock:
+    """Simulated milliseconds that only move when advance() is called, one
+    fixed tick at a time; the windowed game advances it from an
+    accumulator of real time."""
+    def __init__(self, start=0):
+        self.now = float(start)
+
+    def ticks(self):
+        return int(self.now)
+
+    def advance(self, ms=TICK_MS):
+        self.now += ms
+        return int(self.now)
+
+
+# ─── Scheduler ────────────────────────────────────────────────────────────────
+class Timer:
+    """Handle for a scheduled callback; cancel() stops it from firing."""
+    def __init__(self, due, fn, interval):
+        self.due       = due
+        self.fn        = fn
+        self.interval  = interval
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+class Scheduler:
+    """Min-heap of timed callbacks on game-clock milliseconds.
+
+    run(now) pops only the timers that are due, so a frame costs O(k log n)
+    for k firing timers. Callbacks receive `now`; repeating timers are
+    re-armed `interval` ms after the frame they fired on. Cancelled timers
+    are dropped lazily when they reach the top of the heap.
+    """
+    def __init__(self):
+        self.heap      = []
+        self.seq       = 0
+        self.paused_at = None
+
+    def _push(self, timer):
+        self.seq += 1
+        heapq.heappush(self.heap, (timer.due, self.seq, timer))
+        return timer
+
+    def call_at(self, due, fn):
+        return self._push(Timer(due, fn, None))
+
+    def call_every(self, interval, fn, now):
+        return self._push(Timer(now + interval, fn, interval))
+
+    def clear(self):
+        self.heap.clear()
+        self.paused_at = None
+
+    def pause(self, now):
+        if self.paused_at is None:
+            self.paused_at = now
+
+    def resume(self, now):
+        if self.paused_at is None:
+            return
+        shift, self.paused_at = now - self.paused_at, None
+        for _, _, timer in self.heap:
+            timer.due += shift
+        self.heap = [(t.due, seq, t) for _, seq, t in self.heap]
+        heapq.heapify(self.heap)
+
+    def run(self, now):
+        heap = self.heap
+        while heap and heap[0][0] <= now and self.paused_at is None:
+            _, _, timer = heapq.heappop(heap)
+            if timer.cancelled:
+                continue
+            if timer.interval is not None:
+                timer.due = now + timer.interval
+                self._push(timer)
+            timer.fn(now)
+
+    def __len__(self):
+        return sum(not t.cancelled for _, _, t in self.heap)
 
 # ─── Intro ────────────────────────────────────────────────────────────────────
-intro_font  = pygame.font.SysFont(None, 24, bold=True)
 intro_lines = [
     "A long time ago, in a junkyard far, far away...", "",
     "You are the last guardian of the pristine MN12 Thunderbird.",
@@ -81,91 +234,946 @@ intro_lines = [
     "and assemble the final masterpiece", "before they strike!", "",
     "Press ENTER to begin..."
 ]
-intro_surfs  = [intro_font.render(line, True, (255,255,0))
-                for line in intro_lines]
+INTRO_COLOR  = (255, 255, 0)
+intro_font   = pygame.font.SysFont(None, 24, bold=True)
+intro_surfs  = [intro_font.render(line, True, INTRO_COLOR) for line in intro_lines]
 scroll_y     = HEIGHT
 scroll_speed = 0.05
 state_intro  = True
 # ─────────────────────────────────────────────────────────────────────────────
 
 # ─── Load assets ─────────────────────────────────────────────────────────────
-background = pygame.image.load("assets/background.png").convert()
-background = pygame.transform.scale(background, (WIDTH, HEIGHT))
-
-PART_IMAGE_FILES = ["assets/part1.png", "assets/part2.png", "assets/part3.png"]
-part_textures    = []
-for fn in PART_IMAGE_FILES:
-    tex = pygame.image.load(fn).convert_alpha()
-    tex = pygame.transform.scale(tex, (20,20))
-    part_textures.append(tex)
-
-CHAIR_IMAGE = pygame.image.load("assets/chair.png").convert_alpha()
-CHAIR_IMAGE = pygame.transform.scale(CHAIR_IMAGE, (20,20))
-
-BOOMERANG_IMAGE = pygame.image.load("assets/boomerang.png").convert_alpha()
-BOOMERANG_IMAGE = pygame.transform.scale(BOOMERANG_IMAGE, (20,20))
-
-ENEMY_IMAGE = pygame.image.load("assets/enemy.png").convert_alpha()
-ENEMY_IMAGE = pygame.transform.scale(ENEMY_IMAGE, (30,30))
-
-NOS_IMAGE = pygame.image.load("assets/nos.png").convert_alpha()
-NOS_IMAGE = pygame.transform.scale(NOS_IMAGE, (20,20))
-
-PLAYER_IMAGE = pygame.image.load("assets/player.png").convert_alpha()
-PLAYER_IMAGE = pygame.transform.scale(PLAYER_IMAGE, (30,30))
-
-THIEF_IMAGE = pygame.image.load("assets/thief.png").convert_alpha()
-THIEF_IMAGE = pygame.transform.scale(THIEF_IMAGE, (30,30))
-
-SUPERBOOMER_IMAGE = pygame.image.load("assets/super_boomer.png").convert_alpha()
-SUPERBOOMER_IMAGE = pygame.transform.scale(SUPERBOOMER_IMAGE, (80,80))
+# name: (source file, size it is scaled to)
+SPRITE_ASSETS = {
+    "background":   ("assets/background.png",   (WIDTH, HEIGHT)),
+    "part1":        ("assets/part1.png",        (20, 20)),
+    "part2":        ("assets/part2.png",        (20, 20)),
+    "part3":        ("assets/part3.png",        (20, 20)),
+    "chair":        ("assets/chair.png",        (20, 20)),
+    "boomerang":    ("assets/boomerang.png",    (20, 20)),
+    "enemy":        ("assets/enemy.png",        (30, 30)),
+    "nos":          ("assets/nos.png",          (20, 20)),
+    "player":       ("assets/player.png",       (30, 30)),
+    "thief":        ("assets/thief.png",        (30, 30)),
+    "super_boomer": ("assets/super_boomer.png", (80, 80)),
+}
+# (radius, color) of every glow halo a sprite asks asset_cache for
+GLOW_ASSETS = [(20, (255,255,0,100)), (CHAIR_GLOW_RADIUS, CHAIR_GLOW_COLOR),
+               (25, (255,150,0,120))]
+
+BUNDLE_MAGIC  = b"JJA1"
+BUNDLE_HEADER = struct.Struct("<4sI")   # magic, manifest length
+
+def load_raw_assets():
+    """Decode, scale and build masks and glows from the source PNGs.
+
+    Returns (images by name, masks by image, glows by (radius, color)).
+    """
+    images = {}
+    for name, (path, size) in SPRITE_ASSETS.items():
+        img = pygame.image.load(path)
+        img = img.convert() if name == "background" else img.convert_alpha()
+        images[name] = pygame.transform.scale(img, size)
+    masks = {img: pygame.mask.from_surface(img)
+             for name, img in images.items() if name != "background"}
+    glows = {(r, c): AssetCache.render_glow(r, c) for r, c in GLOW_ASSETS}
+    return images, masks, glows
+
+def bundle_key():
+    """What a bundle was built from; any difference makes it stale. Sources
+    are keyed by content, since checkouts and copies don't keep mtimes, and
+    the pygame version decides how they decode and scale."""
+    sources = {}
+    for path, _ in SPRITE_ASSETS.values():
+        with open(path, "rb") as fh:
+            sources[path] = hashlib.sha256(fh.read()).hexdigest()
+    key = {"sources": sources, "sprites": SPRITE_ASSETS, "glows": GLOW_ASSETS,
+           "pygame": pygame.version.ver,
+           "mask_word": memoryview(pygame.mask.Mask((1, 1))).itemsize}
+    return json.loads(json.dumps(key))
+
+def pack_shelves(sizes, width=ATLAS_WIDTH):
+    """Place (w, h) boxes tallest first in rows of `width`; returns
+    (positions in input order, atlas height)."""
+    order = sorted(range(len(sizes)), key=lambda i: -sizes[i][1])
+    places = [None] * len(sizes)
+    x = y = shelf = 0
+    for i in order:
+        w, h = sizes[i]
+        if x + w > width:
+            x, y, shelf = 0, y + shelf, 0
+        places[i] = (x, y)
+        x, shelf = x + w, max(shelf, h)
+    return places, y + shelf
+
+def write_asset_bundle(path=ASSET_BUNDLE_PATH):
+    """Build the bundle from the source PNGs: the background as raw RGB,
+    one RGBA atlas of every sprite and glow, and the sprites' collision
+    masks, behind a JSON manifest. Returns its size in bytes."""
+    images, masks, glows = load_raw_assets()
+    glows  = [glows[r, c] for r, c in GLOW_ASSETS]
+    names  = [n for n in SPRITE_ASSETS if n != "background"]
+    pieces = [images[n] for n in names] + glows
+    places, height = pack_shelves([p.get_size() for p in pieces])
+    atlas  = pygame.Surface((ATLAS_WIDTH, height), pygame.SRCALPHA)
+    for piece, place in zip(pieces, places):
+        atlas.blit(piece, place, special_flags=pygame.BLEND_RGBA_MAX)
+
+    rects = [list(place) + list(p.get_size()) for p, place in zip(pieces, places)]
+    blobs = [pygame.image.tobytes(images["background"], "RGB"),
+             pygame.image.tobytes(atlas, "RGBA")]
+    blobs += [bytes(memoryview(masks[images[n]]).cast("B")) for n in names]
+    offsets = [0]
+    for b in blobs:
+        offsets.append(offsets[-1] + len(b))
+    manifest = {
+        "key":     bundle_key(),
+        "atlas":   [ATLAS_WIDTH, height],
+        "blobs":   offsets,
+        "sprites": dict(zip(names, rects)),
+        "glows":   rects[len(names):],
+    }
+    head = json.dumps(manifest).encode()
+    with open(path, "wb") as fh:
+        fh.write(BUNDLE_HEADER.pack(BUNDLE_MAGIC, len(head)))
+        fh.write(head)
+        for b in blobs:
+            fh.write(b)
+    return BUNDLE_HEADER.size + len(head) + offsets[-1]
+
+def load_asset_bundle(path=ASSET_BUNDLE_PATH):
+    """The load_raw_assets() tuple from a memory-mapped bundle, or None when
+    there is no bundle or it no longer matches its sources."""
+    try:
+        fh = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    with fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        magic, length = BUNDLE_HEADER.unpack_from(mm)
+        if magic != BUNDLE_MAGIC:
+            return None
+        manifest = json.loads(mm[BUNDLE_HEADER.size:BUNDLE_HEADER.size+length])
+        if manifest["key"] != bundle_key():
+            print(f"{path} is out of date, loading the PNGs instead "
+                  "(rebuild it with --build-assets)", file=sys.stderr)
+            return None
+        base = BUNDLE_HEADER.size + length
+        off  = manifest["blobs"]
+        view = memoryview(mm)
+        blob = lambda i: view[base+off[i]:base+off[i+1]]
+
+        # frombuffer() reads straight from the mapping; convert() makes the
+        # only copy, in display format
+        raw        = pygame.image.frombuffer(blob(0), (WIDTH, HEIGHT), "RGB")
+        background = raw.convert()
+        raw        = pygame.image.frombuffer(blob(1), manifest["atlas"], "RGBA")
+        atlas      = raw.convert_alpha()
+        del raw
+
+        images, masks = {"background": background}, {}
+        for i, (name, rect) in enumerate(manifest["sprites"].items()):
+            image = images[name] = atlas.subsurface(rect)
+            mask  = masks[image] = pygame.mask.Mask(rect[2:])
+            memoryview(mask).cast("B")[:] = blob(2+i)
+        glows = {(r, tuple(c)): atlas.subsurface(rect)
+                 for (r, c), rect in zip(GLOW_ASSETS, manifest["glows"])}
+        view.release()
+    return images, masks, glows
+
+# Filled in by load_assets(); run as a script the game loads them on a
+# worker thread while the intro plays, and main() waits on assets_ready.
+background = part_textures = None
+CHAIR_IMAGE = BOOMERANG_IMAGE = ENEMY_IMAGE = NOS_IMAGE = None
+PLAYER_IMAGE = THIEF_IMAGE = SUPERBOOMER_IMAGE = None
+assets_ready = threading.Event()
+asset_error  = None
+
+def load_assets():
+    """Load the gameplay images, masks and glows from the bundle, or the
+    PNGs when it is missing or stale, into the module globals."""
+    global background, part_textures, CHAIR_IMAGE, BOOMERANG_IMAGE
+    global ENEMY_IMAGE, NOS_IMAGE, PLAYER_IMAGE, THIEF_IMAGE, SUPERBOOMER_IMAGE
+    global asset_error
+    try:
+        start  = time.perf_counter()
+        source = "bundle"
+        loaded = None if os.environ.get("JUNKYARD_NO_BUNDLE") == "1" else load_asset_bundle()
+        if loaded is None:
+            source = "png"
+            loaded = load_raw_assets()
+        images, masks, glows = loaded
+        asset_cache.preload(masks, glows)
+
+        background        = images["background"]
+        part_textures     = [images["part1"], images["part2"], images["part3"]]
+        CHAIR_IMAGE       = images["chair"]
+        BOOMERANG_IMAGE   = images["boomerang"]
+        ENEMY_IMAGE       = images["enemy"]
+        NOS_IMAGE         = images["nos"]
+        PLAYER_IMAGE      = images["player"]
+        THIEF_IMAGE       = images["thief"]
+        SUPERBOOMER_IMAGE = images["super_boomer"]
+        startup_ms.update(assets=(time.perf_counter() - start) * 1000,
+                          total=(time.perf_counter() - startup_start) * 1000,
+                          source=source)
+    except BaseException as e:
+        asset_error = e
+    finally:
+        assets_ready.set()
+
+def wait_for_assets():
+    """Readiness barrier for gameplay: block until load_assets() is done,
+    keeping the window responsive, and re-raise anything it failed with."""
+    while not assets_ready.wait(0.05):
+        pygame.event.pump()
+    if asset_error:
+        raise asset_error
 # ─────────────────────────────────────────────────────────────────────────────
 
 def normalize(vx, vy):
     dist = math.hypot(vx, vy)
     return (vx/dist, vy/dist) if dist else (0,0)
 
-# ─── Globals ─────────────────────────────────────────────────────────────────
-delay_event           = None
-current_carried_img   = None
-delivered             = 0
-game_over             = False
-last_chair_drop       = pygame.time.get_ticks()
-last_boom_spawn       = pygame.time.get_ticks()
-last_speed_spawn      = pygame.time.get_ticks()
-respawns              = []
-
-# Boss state
-boss                  = None
-boss_warning_start    = None
-
-# placeholder groups
-parts                 = None
-enemies               = None
-thieves               = None
-chairs                = None
-boomerangs            = None
-boomerang_projectiles = None
-speed_items           = None
-all_sprites           = None
-# ─────────────────────────────────────────────────────────────────────────────
+# ─── Asset Cache ─────────────────────────────────────────────────────────────
+class AssetCache:
+    """Flyweight store of collision masks and glow halos.
 
-# ─── Game Objects ────────────────────────────────────────────────────────────
-class Player(pygame.sprite.Sprite):
+    Everything handed out is shared between sprites and must be treated as
+    read-only: blit from it, never draw onto it.
+    """
     def __init__(self):
+        self.masks  = {}
+        self.glows  = {}
+        self.hits   = 0
+        self.misses = 0
+
+    def mask(self, image):
+        m = self.masks.get(image)
+        if m is None:
+            self.misses += 1
+            m = self.masks[image] = pygame.mask.from_surface(image)
+        else:
+            self.hits += 1
+        return m
+
+    def glow(self, radius, color):
+        key = (radius, color)
+        g = self.glows.get(key)
+        if g is None:
+            self.misses += 1
+            g = self.glows[key] = self.render_glow(radius, color)
+        else:
+            self.hits += 1
+        return g
+
+    @staticmethod
+    def render_glow(radius, color):
+        g = pygame.Surface((radius*2, radius*2), pygame.SRCALPHA)
+        pygame.draw.circle(g, color, (radius, radius), radius)
+        return g
+
+    def preload(self, masks, glows):
+        """Seed the cache with masks and glows built ahead of time."""
+        self.masks.update(masks)
+        self.glows.update(glows)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses,
+                'masks': len(self.masks), 'glows': len(self.glows)}
+
+asset_cache = AssetCache()
+startup_ms  = {"intro": (time.perf_counter() - startup_start) * 1000}
+if __name__ == "__main__":
+    threading.Thread(target=load_assets, name="assets", daemon=True).start()
+else:
+    load_assets()
+    wait_for_assets()
+
+# ─── Entity Store ────────────────────────────────────────────────────────────
+class Entity:
+    """Slotted stand-in for pygame.sprite.Sprite.
+
+    An entity belongs to at most two EntityGroups: one kind group (enemies,
+    chairs, ...) and the draw group, all_sprites. It keeps each group and
+    its index in that group's list, so membership costs four slots instead
+    of a Sprite's group set, instance dict and one dict entry per group.
+    Subclasses declare __slots__ for their own fields. Anything with `rect`
+    and `mask` works with pygame.sprite.collide_rect/collide_mask.
+
+    kill() takes the entity out of both groups and, if it came from an
+    EntityPool, hands it back to the pool.
+    """
+    __slots__ = ("image", "rect", "mask", "pool",
+                 "_kind", "_kind_at", "_draw", "_draw_at")
+
+    def __init__(self):
+        self.pool  = None
+        self._kind = self._draw = None
+
+    def alive(self):
+        return self._kind is not None or self._draw is not None
+
+    def groups(self):
+        return [g for g in (self._kind, self._draw) if g is not None]
+
+    def kill(self):
+        if self.pool and self.alive():
+            self.pool.release(self)
+        if self._kind is not None:
+            self._kind.remove(self)
+        if self._draw is not None:
+            self._draw.remove(self)
+
+class EntityGroup:
+    """Insertion-ordered collection of entities backed by a list.
+
+    remove() leaves a hole that iteration skips, so order is kept like a
+    pygame Group's; holes are squeezed out once they outnumber the live
+    entries. Iterating walks a snapshot, so entities may be added or
+    killed mid-loop. Subclasses hook added() and removed().
+    """
+    def __init__(self, *entities, draw=False):
+        self.members = []
+        self.live    = 0
+        self.draw    = draw
+        self.add(*entities)
+
+    def add(self, *entities):
+        for e in entities:
+            if self.draw:
+                if e._draw is self:
+                    continue
+                if e._draw is not None:
+                    e._draw.remove(e)
+                e._draw, e._draw_at = self, len(self.members)
+            else:
+                if e._kind is self:
+                    continue
+                if e._kind is not None:
+                    e._kind.remove(e)
+                e._kind, e._kind_at = self, len(self.members)
+            self.members.append(e)
+            self.live += 1
+            self.added(e)
+
+    def remove(self, e):
+        if self.draw:
+            if e._draw is not self:
+                return
+            self.members[e._draw_at] = None
+            e._draw = None
+        else:
+            if e._kind is not self:
+                return
+            self.members[e._kind_at] = None
+            e._kind = None
+        self.live -= 1
+        self.removed(e)
+        if len(self.members) > 2*self.live + 32:
+            self.compact()
+
+    def compact(self):
+        self.members = [e for e in self.members if e is not None]
+        for i, e in enumerate(self.members):
+            if self.draw:
+                e._draw_at = i
+            else:
+                e._kind_at = i
+
+    def added(self, e):
+        pass
+
+    def removed(self, e):
+        pass
+
+    def sprites(self):
+        if len(self.members) == self.live:
+            return self.members[:]
+        return [e for e in self.members if e is not None]
+
+    def __iter__(self):
+        return iter(self.sprites())
+
+    def __len__(self):
+        return self.live
+
+    def __contains__(self, e):
+        return (e._draw if self.draw else e._kind) is self
+
+# ─── Spatial Hash ────────────────────────────────────────────────────────────
+class SpatialHash:
+    """Uniform grid that buckets sprites by the cell under their rect center."""
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells     = {}
+        self.where     = {}
+
+    def _key(self, x, y):
+        return (int(x // self.cell_size), int(y // self.cell_size))
+
+    def clear(self):
+        self.cells.clear()
+        self.where.clear()
+
+    def insert(self, sprite):
+        key = self._key(*sprite.rect.center)
+        self.cells.setdefault(key, []).append(sprite)
+        self.where[sprite] = key
+
+    def remove(self, sprite):
+        key = self.where.pop(sprite, None)
+        if key is not None:
+            bucket = self.cells[key]
+            bucket.remove(sprite)
+            if not bucket:
+                del self.cells[key]
+
+    def move(self, sprite):
+        key = self._key(*sprite.rect.center)
+        if self.where.get(sprite) != key:
+            self.remove(sprite)
+            self.cells.setdefault(key, []).append(sprite)
+            self.where[sprite] = key
+
+    def rebuild(self, sprites):
+        self.clear()
+        for s in sprites:
+            self.insert(s)
+
+    def near(self, x, y, reach):
+        """Sprites whose centers may lie within `reach` px on both axes."""
+        x0, y0 = self._key(x-reach, y-reach)
+        x1, y1 = self._key(x+reach, y+reach)
+        cells  = self.cells
+        for cx in range(x0, x1+1):
+            for cy in range(y0, y1+1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    yield from bucket
+
+    def ring(self, cx, cy, r):
+        """Sprites in the cells exactly `r` cells (Chebyshev) from (cx, cy)."""
+        cells = self.cells
+        if r == 0:
+            yield from cells.get((cx, cy), ())
+            return
+        for x in range(cx-r, cx+r+1):
+            yield from cells.get((x, cy-r), ())
+            yield from cells.get((x, cy+r), ())
+        for y in range(cy-r+1, cy+r):
+            yield from cells.get((cx-r, y), ())
+            yield from cells.get((cx+r, y), ())
+
+class PartGroup(EntityGroup):
+    """Group of parts that keeps a spatial index in step with
+    add()/kill(), for thief targeting. Parts never move once added.
+
+    Queries return exactly what a scan in group order would: ties are
+    broken by insertion order, like min() over the group. Small groups
+    are simply scanned.
+    """
+    def __init__(self, *sprites):
+        self.grid   = SpatialHash(PART_INDEX_CELL)
+        self.order  = {}
+        self.seq    = 0
+        self.extent = 0
+        super().__init__(*sprites)
+
+    def added(self, sprite):
+        self.seq += 1
+        self.order[sprite] = self.seq
+        self.extent = max(self.extent, sprite.rect.w, sprite.rect.h)
+        self.grid.insert(sprite)
+
+    def removed(self, sprite):
+        del self.order[sprite]
+        self.grid.remove(sprite)
+
+    def nearest(self, pos, thief):
+        """Closest part by center distance that `thief` may pick up."""
+        x, y    = pos
+        if len(self.order) < PART_INDEX_MIN:
+            return min((p for p in self.order if p.forbidden_thief is not thief),
+                       key=lambda p: (p.rect.centerx-x)**2 + (p.rect.centery-y)**2,
+                       default=None)
+        cs      = self.grid.cell_size
+        cx, cy  = self.grid._key(x, y)
+        last    = max(cx+1, WIDTH//cs+1-cx, cy+1, HEIGHT//cs+1-cy)
+        best    = None
+        best_key = None
+        for r in range(last+1):
+            for p in self.grid.ring(cx, cy, r):
+                if p.forbidden_thief is thief:
+                    continue
+                key = ((p.rect.centerx-x)**2 + (p.rect.centery-y)**2,
+                       self.order[p])
+                if best_key is None or key < best_key:
+                    best, best_key = p, key
+            # anything in ring r+1 is at least r*cs away
+            if best_key is not None and best_key[0] < (r*cs)**2:
+                break
+        return best
+
+# ─── Collisions ──────────────────────────────────────────────────────────────
+class Collisions:
+    """Broadphase-first collision queries for one session.
+
+    Each frame, the first query against a collidable group files its
+    sprites into a SpatialHash; sprites spawned later are filed by added(),
+    and refile() marks a group whose sprites moved. A query only looks at
+    sprites filed near the asker (or the whole group, when it is smaller
+    than COLLIDE_SCAN_MAX), keeps those whose rects overlap and compares
+    masks for those alone. `candidates`, `overlaps` and `hits` count the
+    pairs reaching each stage during the current frame.
+
+    With `coarse` set, rect overlap alone counts as a hit except for
+    queries made with `critical=True` (the ones that end the game).
+    """
+    GROUPS = ("enemies", "chairs", "thieves", "parts", "boomerangs", "speed_items")
+
+    def __init__(self, game):
+        self.game       = game
+        self.grids      = {name: SpatialHash(COLLIDE_CELL) for name in self.GROUPS}
+        self.extent     = dict.fromkeys(self.GROUPS, 0)
+        self.stale      = set(self.GROUPS)
+        self.coarse     = False
+        self.candidates = 0
+        self.overlaps   = 0
+        self.hits       = 0
+
+    def begin(self):
+        self.candidates = self.overlaps = self.hits = 0
+        self.stale.update(self.GROUPS)
+
+    def refile(self, name):
+        self.stale.add(name)
+
+    def added(self, sprite, name):
+        if name in self.grids and name not in self.stale:
+            self.grids[name].move(sprite)
+            self.extent[name] = max(self.extent[name], *sprite.rect.size)
+
+    def touching(self, a, b, critical):
+        """Narrowphase for two sprites whose rects overlap."""
+        if (self.coarse and not critical) or pygame.sprite.collide_mask(a, b):
+            self.hits += 1
+            return True
+        return False
+
+    def pair(self, a, b, critical=False):
+        """Whether the masks of `a` and `b` overlap."""
+        self.candidates += 1
+        if not a.rect.colliderect(b.rect):
+            return False
+        self.overlaps += 1
+        return self.touching(a, b, critical)
+
+    def overlapping(self, sprite, name):
+        """Sprites of group `name` whose rects overlap `sprite`'s."""
+        group = getattr(self.game, name)
+        if len(group) < COLLIDE_SCAN_MAX:
+            near = group.sprites()
+        else:
+            if name in self.stale:
+                self.stale.discard(name)
+                self.grids[name].rebuild(group)
+                self.extent[name] = max(max(s.rect.size) for s in group)
+            reach = (max(sprite.rect.size) + self.extent[name]) / 2
+            near  = list(self.grids[name].near(*sprite.rect.center, reach))
+        self.candidates += len(near)
+        rect = sprite.rect
+        hits = [s for s in near if rect.colliderect(s.rect)
+                and s is not sprite and s.alive()]
+        self.overlaps += len(hits)
+        return hits
+
+    def colliding(self, sprite, name, critical=False):
+        """Sprites of group `name` whose masks overlap `sprite`'s."""
+        for other in self.overlapping(sprite, name):
+            if self.touching(sprite, other, critical):
+                yield other
+
+    def first(self, sprite, name, critical=False):
+        for other in self.overlapping(sprite, name):
+            if self.touching(sprite, other, critical):
+                return other
+        return None
+
+    def path(self, sprite, start):
+        """Centers `sprite` passes through moving from `start` to where it
+        is now, no more than half its smaller side apart; just the current
+        center when the move is that short."""
+        ex, ey = sprite.rect.center
+        sx, sy = start
+        n = int(math.hypot(ex-sx, ey-sy) / max(1, min(sprite.rect.size)/2)) + 1
+        return ([(round(sx + (ex-sx)*k/n), round(sy + (ey-sy)*k/n))
+                 for k in range(1, n)] + [(ex, ey)])
+
+    def swept_first(self, sprite, name, start, critical=False):
+        """first() at every point of path(), so a fast mover can't step
+        over a target between ticks."""
+        end = sprite.rect.center
+        try:
+            for center in self.path(sprite, start):
+                sprite.rect.center = center
+                hit = self.first(sprite, name, critical)
+                if hit:
+                    return hit
+            return None
+        finally:
+            sprite.rect.center = end
+
+    def swept_pair(self, mover, other, start, critical=False):
+        """pair() at every point of `mover`'s path()."""
+        end = mover.rect.center
+        try:
+            for center in self.path(mover, start):
+                mover.rect.center = center
+                if self.pair(mover, other, critical):
+                    return True
+            return False
+        finally:
+            mover.rect.center = end
+
+    def counts(self):
+        return {"candidates": self.candidates, "overlaps": self.overlaps,
+                "hits": self.hits}
+
+# ─── Flow Field ──────────────────────────────────────────────────────────────
+FLOW_COLS = -(-WIDTH // FLOW_CELL)
+FLOW_ROWS = -(-HEIGHT // FLOW_CELL)
+
+def flow_cell(x, y):
+    cx = min(FLOW_COLS-1, max(0, int(x) // FLOW_CELL))
+    cy = min(FLOW_ROWS-1, max(0, int(y) // FLOW_CELL))
+    return cy*FLOW_COLS + cx
+
+class ChairGroup(EntityGroup):
+    """Group of chairs that counts, per flow-field cell, the chairs
+    an enemy near its center would overlap, and bumps `version` whenever a
+    chair comes or goes. Chairs never move once added."""
+    def __init__(self, *sprites):
+        self.cover   = collections.Counter()
+        self.version = 0
+        super().__init__(*sprites)
+
+    def cells(self, chair):
+        # enemies sit anywhere in a cell, so keep half a cell of clearance
+        half = FLOW_CELL // 2
+        r    = chair.rect.inflate(ENEMY_IMAGE.get_width() + half,
+                                  ENEMY_IMAGE.get_height() + half)
+        x0   = max(0, -(-(r.left - half) // FLOW_CELL))
+        x1   = min(FLOW_COLS-1, (r.right - 1 - half) // FLOW_CELL)
+        y0   = max(0, -(-(r.top - half) // FLOW_CELL))
+        y1   = min(FLOW_ROWS-1, (r.bottom - 1 - half) // FLOW_CELL)
+        return [cy*FLOW_COLS + cx for cy in range(y0, y1+1)
+                                  for cx in range(x0, x1+1)]
+
+    def added(self, sprite):
+        self.cover.update(self.cells(sprite))
+        self.version += 1
+
+    def removed(self, sprite):
+        for c in self.cells(sprite):
+            self.cover[c] -= 1
+            if not self.cover[c]:
+                del self.cover[c]
+        self.version += 1
+
+class FlowField:
+    """Shortest routes from every cell to the player's cell around chairs,
+    shared by all enemies.
+
+    Dijkstra over FLOW_CELL cells with 8-way moves that don't cut corners
+    past a covered cell. It reruns when the chair group changes or the
+    player gets more than FLOW_SLACK cells from the cell it was routed
+    to; enemies that close go straight for the player anyway. Covered
+    cells get a way out but are never routed through.
+    """
+    def __init__(self):
+        n               = FLOW_COLS*FLOW_ROWS
+        self.next       = [-1] * n
+        self.key        = None
+        self.recomputes = 0
+        self.last_ms    = 0.0
+        self._targets   = None
+        # (neighbour, cost, corner, corner); cell n is a never-covered dummy
+        self.links      = []
+        for c in range(n):
+            cx, cy = c % FLOW_COLS, c // FLOW_COLS
+            links  = []
+            for dx, dy in ((1,0), (-1,0), (0,1), (0,-1),
+                           (1,1), (1,-1), (-1,1), (-1,-1)):
+                nx, ny = cx+dx, cy+dy
+                if not (0 <= nx < FLOW_COLS and 0 <= ny < FLOW_ROWS):
+                    continue
+                if dx and dy:
+                    links.append((ny*FLOW_COLS + nx, 14,
+                                  cy*FLOW_COLS + nx, ny*FLOW_COLS + cx))
+                else:
+                    links.append((ny*FLOW_COLS + nx, 10, n, n))
+            self.links.append(tuple(links))
+
+    def update(self, goal, chairs):
+        """Re-route if needed; returns whether the field was recomputed."""
+        key = (flow_cell(*goal), chairs, chairs.version)
+        if self.key and key[1:] == self.key[1:]:
+            (gx, gy), (cx, cy) = (divmod(c, FLOW_COLS)[::-1]
+                                  for c in (self.key[0], key[0]))
+            if max(abs(gx - cx), abs(gy - cy)) <= FLOW_SLACK:
+                return False
+        self.key = key
+        start    = time.perf_counter()
+
+        size    = len(self.next)
+        covered = bytearray(size + 1)
+        for c in chairs.cover:
+            covered[c] = 1
+        dist    = [math.inf] * size
+        nxt     = [-1] * size
+        dist[key[0]] = 0
+        heap    = [(0, key[0])]
+        pop, push, links = heapq.heappop, heapq.heappush, self.links
+        while heap:
+            d, c = pop(heap)
+            if d > dist[c]:
+                continue
+            for n, cost, a, b in links[c]:
+                nd = d + cost
+                if nd < dist[n] and not (covered[a] or covered[b]):
+                    dist[n] = nd
+                    nxt[n]  = c
+                    if not covered[n]:
+                        push(heap, (nd, n))
+
+        self.next       = nxt
+        self._targets   = None
+        self.recomputes += 1
+        self.last_ms    = (time.perf_counter() - start) * 1000
+        return True
+
+    def heading(self, x, y):
+        """Point an enemy at (x, y) should steer for, or None to head
+        straight for the player."""
+        n = self.next[flow_cell(x, y)]
+        if n < 0 or n == self.key[0]:
+            return None
+        return (n % FLOW_COLS + 0.5) * FLOW_CELL, (n // FLOW_COLS + 0.5) * FLOW_CELL
+
+    def targets(self):
+        """heading() for every cell as an array, NaN for straight pursuit."""
+        if self._targets is None:
+            nxt = np.array(self.next)
+            t   = np.column_stack(((nxt % FLOW_COLS + 0.5) * FLOW_CELL,
+                                   (nxt // FLOW_COLS + 0.5) * FLOW_CELL))
+            t[(nxt < 0) | (nxt == self.key[0])] = np.nan
+            self._targets = t
+        return self._targets
+
+# ─── Spawn Placement ─────────────────────────────────────────────────────────
+@functools.lru_cache(maxsize=None)
+def poisson_disk(width, height, spacing, tile=256, seed=0):
+    """Whole-pixel points covering the rectangle, no two closer than
+    `spacing`, in shuffled order.
+
+    Bridson's algorithm fills one `tile` square with wrap-around distances,
+    so copies of it laid edge to edge keep the spacing across the seams.
+    """
+    rnd    = random.Random(seed)
+    n      = math.ceil(tile / (spacing / math.sqrt(2)))
+    cell   = tile / n
+    grid   = [None] * (n*n)
+    sq     = spacing * spacing
+    points = []
+    active = []
+
+    def fits(x, y):
+        cx, cy = int(x // cell), int(y // cell)
+        for gy in range(cy-2, cy+3):
+            row = (gy % n) * n
+            for gx in range(cx-2, cx+3):
+                p = grid[row + gx % n]
+                if p:
+                    dx, dy = abs(p[0]-x), abs(p[1]-y)
+                    dx, dy = min(dx, tile-dx), min(dy, tile-dy)
+                    if dx*dx + dy*dy < sq:
+                        return False
+        return True
+
+    def place(x, y):
+        grid[int(y // cell)*n + int(x // cell)] = (x, y)
+        points.append((x, y))
+        active.append((x, y))
+
+    place(rnd.uniform(0, tile), rnd.uniform(0, tile))
+    while active:
+        i = rnd.randrange(len(active))
+        px, py = active[i]
+        for _ in range(30):
+            a = rnd.uniform(0, 2*math.pi)
+            r = rnd.uniform(spacing, 2*spacing)
+            x, y = (px + r*math.cos(a)) % tile, (py + r*math.sin(a)) % tile
+            if fits(x, y):
+                place(x, y)
+                break
+        else:
+            active[i] = active[-1]
+            active.pop()
+
+    tiled = [(int(x + tx), int(y + ty)) for tx in range(0, width, tile)
+             for ty in range(0, height, tile) for x, y in points
+             if x + tx < width and y + ty < height]
+    rnd.shuffle(tiled)
+    return tuple(tiled)
+
+class Placement:
+    """Random free spawn points for one session, in bounded time.
+
+    Spots are drawn from a fixed Poisson-disk set of candidates: a query
+    starts at a random one and examines at most SPAWN_TRIES, returning the
+    first that is inside the asked-for margins, far enough from `away` and
+    on a free cell of the occupancy grid. The grid marks every cell within
+    SPAWN_CLEARANCE of a solid sprite; it is rebuilt at most once a tick,
+    when a query needs it, and each spot handed out is marked at once. If
+    no candidate passes, the one farthest from `away` is used and counted
+    in `fallbacks`.
+    """
+    SOLID = ("enemies", "chairs", "thieves", "parts", "boomerangs", "speed_items")
+
+    def __init__(self, game):
+        self.game      = game
+        self.points    = poisson_disk(WIDTH, HEIGHT, SPAWN_SPACING)
+        self.regions   = {}
+        self.cols      = -(-WIDTH // SPAWN_CELL)
+        self.rows      = -(-HEIGHT // SPAWN_CELL)
+        self.occupied  = bytearray(self.cols * self.rows)
+        self.built_at  = None
+        self.queries   = 0
+        self.fallbacks = 0
+
+    def invalidate(self):
+        self.built_at = None
+
+    def mark(self, rect):
+        r  = rect.inflate(2*SPAWN_CLEARANCE, 2*SPAWN_CLEARANCE)
+        x0 = max(0, r.left // SPAWN_CELL)
+        x1 = min(self.cols-1, (r.right-1) // SPAWN_CELL)
+        if x1 < x0:
+            return
+        row = b"\x01" * (x1 - x0 + 1)
+        for cy in range(max(0, r.top // SPAWN_CELL),
+                        min(self.rows-1, (r.bottom-1) // SPAWN_CELL) + 1):
+            self.occupied[cy*self.cols + x0 : cy*self.cols + x1 + 1] = row
+
+    def rebuild(self):
+        game = self.game
+        self.occupied[:] = bytes(len(self.occupied))
+        for s in (game.player, game.cashier, game.boss):
+            if s:
+                self.mark(s.rect)
+        for name in self.SOLID:
+            for s in getattr(game, name):
+                self.mark(s.rect)
+        self.built_at = game.ticks()
+
+    def region(self, low, high):
+        points = self.regions.get((low, high))
+        if points is None:
+            points = self.regions[low, high] = [
+                (x, y) for x, y in self.points
+                if low <= x <= WIDTH-high and low <= y <= HEIGHT-high]
+        return points
+
+    def spot(self, low=50, high=50, away=None, distance=0):
+        """A free point in [low, WIDTH-high] x [low, HEIGHT-high] at least
+        `distance` from `away`."""
+        if self.built_at != self.game.ticks():
+            self.rebuild()
+        self.queries += 1
+        points = self.region(low, high)
+        start  = self.game.rng.randrange(len(points))
+        ax, ay = away or (0, 0)
+        best, best_d = None, -1.0
+        for k in range(min(SPAWN_TRIES, len(points))):
+            x, y = points[(start + k) % len(points)]
+            d = math.hypot(x-ax, y-ay) if away else distance
+            if d >= distance and not self.occupied[(y // SPAWN_CELL)*self.cols
+                                                   + x // SPAWN_CELL]:
+                best = (x, y)
+                break
+            if d > best_d:
+                best, best_d = (x, y), d
+        else:
+            self.fallbacks += 1
+        self.mark(pygame.Rect(best, (0, 0)))
+        return best
+
+# ─── Entity Pools ────────────────────────────────────────────────────────────
+class EntityPool:
+    """Free list of killed entities of one type, reused instead of
+    reallocated. `factory(*args)` builds an entity when the list is empty;
+    a reused one gets reset() with the spawn arguments instead. Entity.kill()
+    hands pooled entities back."""
+    def __init__(self, factory):
+        self.factory    = factory
+        self.free       = []
+        self.live       = 0
+        self.high_water = 0
+        self.created    = 0
+        self.reused     = 0
+
+    def acquire(self, *args):
+        if self.free:
+            sprite = self.free.pop()
+            sprite.reset(*args)
+            self.reused += 1
+        else:
+            sprite = self.factory(*args)
+            sprite.pool = self
+            self.created += 1
+        self.live      += 1
+        self.high_water = max(self.high_water, self.live)
+        return sprite
+
+    def release(self, sprite):
+        self.live -= 1
+        self.free.append(sprite)
+
+    def stats(self):
+        return {"size": self.live + len(self.free), "live": self.live,
+                "high_water": self.high_water, "created": self.created,
+                "reused": self.reused}
+
+# ─── Game Objects ────────────────────────────────────────────────────────────
+class Player(Entity):
+    __slots__ = ("game", "carrying", "has_boomerang", "speed_multiplier",
+                 "boost_end_time", "boost_timer")
+
+    def __init__(self, game):
         super().__init__()
+        self.game  = game
         self.image = PLAYER_IMAGE
         self.rect  = self.image.get_rect(center=(WIDTH//2, HEIGHT//2))
-        self.mask  = pygame.mask.from_surface(self.image)
+        self.mask  = asset_cache.mask(self.image)
         self.carrying         = False
         self.has_boomerang    = False
         self.speed_multiplier = 1.0
         self.boost_end_time   = 0
+        self.boost_timer      = None
+
+    def boost(self, now):
+        if self.boost_timer:
+            self.boost_timer.cancel()
+        self.speed_multiplier = SPEEDBOOST_MULTIPLIER
+        self.boost_end_time   = now + SPEEDBOOST_DURATION
+        self.boost_timer      = self.game.scheduler.call_at(
+            self.boost_end_time, self.end_boost)
+
+    def end_boost(self, now):
+        self.speed_multiplier = 1.0
+        self.boost_timer      = None
 
     def update(self, keys):
-        now = pygame.time.get_ticks()
-        if now > self.boost_end_time:
-            self.speed_multiplier = 1.0
         speed = PLAYER_SPEED * self.speed_multiplier
         dx = dy = 0
         if keys[pygame.K_LEFT]:   dx = -speed
@@ -175,81 +1183,93 @@ class Player(pygame.sprite.Sprite):
         self.rect.x = max(0, min(WIDTH-self.rect.w, self.rect.x + dx))
         self.rect.y = max(0, min(HEIGHT-self.rect.h, self.rect.y + dy))
 
-class Part(pygame.sprite.Sprite):
-    def __init__(self, pos):
+class Part(Entity):
+    __slots__ = ("game", "glow", "forbidden_thief")
+
+    def __init__(self, game, pos, image=None):
         super().__init__()
-        self.image = random.choice(part_textures)
-        self.rect  = self.image.get_rect(center=pos)
-        self.mask  = pygame.mask.from_surface(self.image)
+        self.game = game
+        self.glow = asset_cache.glow(20, (255,255,0,100))
+        self.rect = pygame.Rect(0, 0, 0, 0)
+        self.reset(pos, image)
+
+    def reset(self, pos, image=None):
+        """`image` defaults to a random part texture. The rect is resized
+        in place, so reuse doesn't allocate one."""
+        self.image = image or self.game.rng.choice(part_textures)
+        self.rect.size   = self.image.get_size()
+        self.rect.center = pos
+        self.mask  = asset_cache.mask(self.image)
         self.forbidden_thief = None
-        glow_r = 20
-        self.glow = pygame.Surface((glow_r*2,glow_r*2), pygame.SRCALPHA)
-        pygame.draw.circle(self.glow, (255,255,0,100),
-                           (glow_r,glow_r), glow_r)
 
-class Enemy(pygame.sprite.Sprite):
+class Enemy(Entity):
+    __slots__ = ()
+
     def __init__(self, pos):
         super().__init__()
         self.image = ENEMY_IMAGE
         self.rect  = self.image.get_rect(center=pos)
-        self.mask  = pygame.mask.from_surface(self.image)
+        self.mask  = asset_cache.mask(self.image)
 
-class Thief(pygame.sprite.Sprite):
-    def __init__(self, pos):
+    def reset(self, pos):
+        self.rect.center = pos
+
+class Thief(Entity):
+    __slots__ = ("game", "dir_x", "dir_y", "carrying", "carried_image",
+                 "drop_time", "cooldown_until")
+
+    def __init__(self, game, pos):
         super().__init__()
+        self.game  = game
         self.image = THIEF_IMAGE
         self.rect  = self.image.get_rect(center=pos)
-        self.mask  = pygame.mask.from_surface(self.image)
-        angle       = random.uniform(0,2*math.pi)
-        self.direction      = (math.cos(angle), math.sin(angle))
+        self.mask  = asset_cache.mask(self.image)
+        angle       = self.game.rng.uniform(0,2*math.pi)
+        self.dir_x          = math.cos(angle)
+        self.dir_y          = math.sin(angle)
         self.carrying       = False
         self.carried_image  = None
         self.drop_time      = None
         self.cooldown_until = 0
 
-    def update(self):
-        now = pygame.time.get_ticks()
-        if self.carrying and now >= self.drop_time:
-            dropped = Part(self.rect.center)
-            dropped.image           = self.carried_image
-            dropped.rect            = dropped.image.get_rect(center=self.rect.center)
-            dropped.mask            = pygame.mask.from_surface(dropped.image)
-            dropped.forbidden_thief = self
-            parts.add(dropped); all_sprites.add(dropped)
-            self.carrying           = False
-            self.carried_image      = None
-            self.drop_time          = None
-            self.cooldown_until     = now + THIEF_COOLDOWN
-            return
+    def steal(self, image, now):
+        self.carrying      = True
+        self.carried_image = image
+        self.drop_time     = now + self.game.rng.randint(THIEF_DROP_MIN,THIEF_DROP_MAX)
+        self.game.scheduler.call_at(self.drop_time, self.drop_part)
 
+    def drop_part(self, now):
+        dropped = self.game.spawn("parts", self.rect.center, self.carried_image)
+        dropped.forbidden_thief = self
+        self.carrying           = False
+        self.carried_image      = None
+        self.drop_time          = None
+        self.cooldown_until     = now + THIEF_COOLDOWN
+
+    def update(self):
+        now = self.game.ticks()
         if now >= self.cooldown_until and not self.carrying:
-            if player.carrying and pygame.sprite.collide_mask(self, player):
-                self.carrying      = True
-                self.carried_image = current_carried_img
-                player.carrying    = False
-                self.drop_time     = now + random.randint(THIEF_DROP_MIN,THIEF_DROP_MAX)
+            player     = self.game.player
+            collisions = self.game.collisions
+            if player.carrying and collisions.pair(self, player):
+                player.carrying = False
+                self.steal(self.game.current_carried_img, now)
             else:
-                for p in parts:
-                    if p.forbidden_thief is self: continue
-                    if pygame.sprite.collide_mask(self, p):
-                        self.carrying      = True
-                        self.carried_image = p.image
+                for p in collisions.colliding(self, "parts"):
+                    if p.forbidden_thief is not self:
                         p.kill()
-                        self.drop_time     = now + random.randint(THIEF_DROP_MIN,THIEF_DROP_MAX)
+                        self.steal(p.image, now)
                         break
 
         if not self.carrying:
-            candidates = [p for p in parts if p.forbidden_thief is not self]
-            if candidates:
-                target = min(candidates,
-                             key=lambda p: (p.rect.centerx-self.rect.centerx)**2
-                                         + (p.rect.centery-self.rect.centery)**2)
+            target = self.game.parts.nearest(self.rect.center, self)
+            if target:
                 dx, dy = target.rect.centerx-self.rect.centerx, target.rect.centery-self.rect.centery
                 dir_x, dir_y = normalize(dx, dy)
             else:
-                dir_x, dir_y = self.direction
+                dir_x, dir_y = self.dir_x, self.dir_y
         else:
-            dir_x, dir_y = self.direction
+            dir_x, dir_y = self.dir_x, self.dir_y
 
         self.rect.x += dir_x * THIEF_SPEED
         self.rect.y += dir_y * THIEF_SPEED
@@ -258,140 +1278,185 @@ class Thief(pygame.sprite.Sprite):
             dir_x = -dir_x; bounced = True
         if self.rect.top < 0 or self.rect.bottom > HEIGHT:
             dir_y = -dir_y; bounced = True
-        if bounced or random.random()<0.02:
-            ang = random.uniform(0,2*math.pi)
+        if bounced or self.game.rng.random()<0.02:
+            ang = self.game.rng.uniform(0,2*math.pi)
             dir_x, dir_y = math.cos(ang), math.sin(ang)
-        self.direction = (dir_x, dir_y)
+        self.dir_x, self.dir_y = dir_x, dir_y
+
+class Cashier(Entity):
+    __slots__ = ()
 
-class Cashier(pygame.sprite.Sprite):
     def __init__(self, pos):
         super().__init__()
         self.image = pygame.Surface((30,30), pygame.SRCALPHA)
         self.rect  = self.image.get_rect(center=pos)
 
-class Chair(pygame.sprite.Sprite):
-    def __init__(self, pos):
+class Chair(Entity):
+    __slots__ = ("game", "spawn_time", "glow")
+
+    def __init__(self, game, pos):
         super().__init__()
+        self.game  = game
         self.image = CHAIR_IMAGE
         self.rect  = self.image.get_rect(center=pos)
-        self.mask  = pygame.mask.from_surface(self.image)
-        self.spawn_time = pygame.time.get_ticks()
-        self.glow = pygame.Surface((CHAIR_GLOW_RADIUS*2,CHAIR_GLOW_RADIUS*2),
-                                   pygame.SRCALPHA)
-        pygame.draw.circle(self.glow, CHAIR_GLOW_COLOR,
-                           (CHAIR_GLOW_RADIUS,CHAIR_GLOW_RADIUS),
-                           CHAIR_GLOW_RADIUS)
-
-class BoomerangItem(pygame.sprite.Sprite):
+        self.mask  = asset_cache.mask(self.image)
+        self.spawn_time = self.game.ticks()
+        self.glow = asset_cache.glow(CHAIR_GLOW_RADIUS, CHAIR_GLOW_COLOR)
+
+    def reset(self, pos):
+        self.rect.center = pos
+        self.spawn_time  = self.game.ticks()
+
+class BoomerangItem(Entity):
+    __slots__ = ("glow",)
+
     def __init__(self, pos):
         super().__init__()
         self.image = BOOMERANG_IMAGE
         self.rect  = self.image.get_rect(center=pos)
-        self.mask  = pygame.mask.from_surface(self.image)
-        glow_r = 25
-        self.glow = pygame.Surface((glow_r*2,glow_r*2),pygame.SRCALPHA)
-        pygame.draw.circle(self.glow, CHAIR_GLOW_COLOR,
-                           (glow_r,glow_r), glow_r)
-
-class BoomerangProjectile(pygame.sprite.Sprite):
-    def __init__(self, start_pos):
+        self.mask  = asset_cache.mask(self.image)
+        self.glow = asset_cache.glow(25, CHAIR_GLOW_COLOR)
+
+@functools.lru_cache(maxsize=None)
+def boomerang_arc(speed):
+    """Arc parameter t of each tick of a throw at `speed`: up by `speed` a
+    tick until it reaches 1, then back down until it reaches 0."""
+    ts, t = [], 0.0
+    while t < 1.0:
+        t = min(1.0, t + speed)
+        ts.append(t)
+    while True:
+        t -= speed
+        if t <= 0.0:
+            return tuple(ts)
+        ts.append(t)
+
+class BoomerangProjectile(Entity):
+    """Flies a quadratic Bézier out and back, one precomputed point per
+    tick, checking the stretch between points for hits."""
+    __slots__ = ("game", "path", "step")
+
+    def __init__(self, game, start_pos, aim):
         super().__init__()
+        self.game  = game
         self.image = BOOMERANG_IMAGE
         self.rect  = self.image.get_rect(center=start_pos)
-        self.mask  = pygame.mask.from_surface(self.image)
-        self.start   = pygame.math.Vector2(start_pos)
-        self.end     = pygame.math.Vector2(start_pos)
-        mx, my      = pygame.mouse.get_pos()
-        dirv        = pygame.math.Vector2(mx,my)-self.start
+        self.mask  = asset_cache.mask(self.image)
+        self.reset(start_pos, aim)
+
+    def reset(self, start_pos, aim):
+        self.rect.center = start_pos
+        sx, sy      = start_pos
+        mx, my      = aim
+        dirv        = pygame.math.Vector2(mx-sx, my-sy)
         if dirv.length()==0:
             dirv = pygame.math.Vector2(1,0)
         dirv        = dirv.normalize()*150
-        self.control = self.start + dirv + pygame.math.Vector2(0,-75)
-        self.t       = 0.0
-        self.speed   = BOOMERANG_SPEED
-        self.returning=False
+        cx, cy      = sx + dirv.x, sy + dirv.y - 75
+        # the arc ends where it starts
+        self.path = [(round(sx*(1-t)**2 + cx*2*(1-t)*t + sx*t**2),
+                      round(sy*(1-t)**2 + cy*2*(1-t)*t + sy*t**2))
+                     for t in boomerang_arc(BOOMERANG_SPEED)]
+        self.step = 0
 
     def update(self):
-        now = pygame.time.get_ticks()
-        if not self.returning:
-            self.t += self.speed
-            if self.t >= 1.0:
-                self.t        = 1.0
-                self.returning=True
-        else:
-            self.t -= self.speed
-            if self.t <= 0.0:
-                self.kill()
-                return
-
-        p = (self.start*(1-self.t)**2 +
-             self.control*2*(1-self.t)*self.t +
-             self.end*self.t**2)
-        self.rect.center = (round(p.x), round(p.y))
+        game = self.game
+        now  = game.ticks()
+        if self.step == len(self.path):
+            self.kill()
+            return
+        start = self.rect.center
+        self.rect.center = self.path[self.step]
+        self.step += 1
 
         # hit regular enemies
-        hit = pygame.sprite.spritecollideany(self, enemies,
-                                            pygame.sprite.collide_mask)
+        hit = game.collisions.swept_first(self, "enemies", start)
         if hit:
             hit.kill()
-            respawns.append(now + BOOMERANG_RESPAWN_DELAY)
+            game.scheduler.call_at(now + BOOMERANG_RESPAWN_DELAY,
+                                   game.respawn_enemy)
         # hit boss?
-        global boss
-        if boss and pygame.sprite.collide_mask(self, boss):
-            boss.health -= 1
+        if game.boss and game.collisions.swept_pair(self, game.boss, start):
+            game.boss.health -= 1
             self.kill()
-            if boss.health <= 0:
-                boss.kill()
-                boss = None
+            if game.boss.health <= 0:
+                game.boss.kill()
+                game.boss = None
+                game.boss_kills += 1
+
+class SpeedBoostItem(Entity):
+    __slots__ = ("glow",)
 
-class SpeedBoostItem(pygame.sprite.Sprite):
     def __init__(self, pos):
         super().__init__()
         self.image = NOS_IMAGE
         self.rect  = self.image.get_rect(center=pos)
-        self.mask  = pygame.mask.from_surface(self.image)
-        glow_r = 25
-        self.glow = pygame.Surface((glow_r*2,glow_r*2),pygame.SRCALPHA)
-        pygame.draw.circle(self.glow, (255,150,0,120),
-                           (glow_r,glow_r),glow_r)
+        self.mask  = asset_cache.mask(self.image)
+        self.glow = asset_cache.glow(25, (255,150,0,120))
 
-class SuperBoomer(pygame.sprite.Sprite):
-    def __init__(self):
+class SuperBoomer(Entity):
+    __slots__ = ("game", "health", "sprint_dir", "sprint_target", "chair_timer",
+                 "state_timer", "state", "state_start", "moved_from")
+
+    def __init__(self, game):
         super().__init__()
+        self.game  = game
         self.image = SUPERBOOMER_IMAGE
         self.rect  = self.image.get_rect(center=(WIDTH//2, HEIGHT//2))
-        self.mask  = pygame.mask.from_surface(self.image)
+        self.mask  = asset_cache.mask(self.image)
         self.health          = BOSS_HIT_POINTS
-        self.state           = "walking"
-        self.state_start     = pygame.time.get_ticks()
-        self.last_chair_throw= pygame.time.get_ticks()
         self.sprint_dir = (0,0)
         self.sprint_target = None
-    def update(self):
-        now = pygame.time.get_ticks()
+        self.moved_from = self.rect.center
+        now = self.game.ticks()
+        self.chair_timer = self.game.scheduler.call_every(
+            BOSS_CHAIR_INTERVAL, self.throw_chair, now)
+        self.state_timer = None
+        self.walk(now)
+
+    # state transitions run from the scheduler: walk -> charge -> sprint
+    def walk(self, now):
+        self.state       = "walking"
+        self.state_start = now
+        self.state_timer = self.game.scheduler.call_at(now + BOSS_STOP_DURATION,
+                                                       self.charge)
+
+    def charge(self, now):
+        self.state       = "charging"
+        self.state_start = now
+        self.state_timer = self.game.scheduler.call_at(now + BOSS_CHARGE_TIME,
+                                                       self.sprint)
+
+    def sprint(self, now):
+        # lock sprint direction at the end of the charge
+        px, py = self.game.player.rect.center
+        dx, dy = px - self.rect.centerx, py - self.rect.centery
+        self.sprint_dir  = normalize(dx, dy)
+        self.state       = "sprinting"
+        self.state_start = now
+        self.state_timer = self.game.scheduler.call_at(now + BOSS_SPRINT_DURATION,
+                                                       self.walk)
+
+    def throw_chair(self, now):
+        self.game.spawn("chairs", self.rect.center)
+
+    def kill(self):
+        self.chair_timer.cancel()
+        self.state_timer.cancel()
+        super().kill()
 
+    def update(self):
+        self.moved_from = self.rect.center
         # 1) WALKING: slow constant pursuit
         if self.state == "walking":
-            dx = player.rect.centerx - self.rect.centerx
-            dy = player.rect.centery - self.rect.centery
+            dx = self.game.player.rect.centerx - self.rect.centerx
+            dy = self.game.player.rect.centery - self.rect.centery
             dist = math.hypot(dx, dy) or 1
             # move slowly toward player
             self.rect.x += (dx/dist) * BOSS_PURSUIT_SPEED
             self.rect.y += (dy/dist) * BOSS_PURSUIT_SPEED
 
-            # after walking long enough, go charge
-            if now - self.state_start >= BOSS_STOP_DURATION:
-                self.state = "charging"
-                self.state_start = now
-
-        # 2) CHARGING: stand still, lock sprint direction
-        elif self.state == "charging":
-            if now - self.state_start >= BOSS_CHARGE_TIME:
-                px, py = player.rect.center
-                dx, dy = px - self.rect.centerx, py - self.rect.centery
-                self.sprint_dir = normalize(dx, dy)
-                self.state = "sprinting"
-                self.state_start = now
+        # 2) CHARGING: stand still until the sprint timer fires
 
         # 3) SPRINTING: burst of speed along that locked vector
         elif self.state == "sprinting":
@@ -401,184 +1466,421 @@ class SuperBoomer(pygame.sprite.Sprite):
             self.rect.x = max(0, min(self.rect.x, WIDTH - self.rect.width))
             self.rect.y = max(0, min(self.rect.y, HEIGHT - self.rect.height))
 
-            # once sprint duration is up, go back to walking
-            if now - self.state_start >= BOSS_SPRINT_DURATION:
-                self.state = "walking"
-                self.state_start = now
-
-        # 4) Throw chairs regardless of state
-        if now - self.last_chair_throw >= BOSS_CHAIR_INTERVAL:
-            c = Chair(self.rect.center)
-            chairs.add(c); all_sprites.add(c)
-            self.last_chair_throw = now
-
-# ─── Handlers ─────────────────────────────────────────────────────────────────
-def handle_delivery():
-    global delivered, delay_event, current_carried_img, boss_warning_start
-    delivered += 1
-    if delivered % 10 == 0:
-        tx = random.randint(50, WIDTH-50)
-        ty = random.randint(50, HEIGHT-50)
-        new_thief = Thief((tx,ty))
-        thieves.add(new_thief); all_sprites.add(new_thief)
-    # trigger boss warning
-    if delivered % BOSS_SPAWN_COUNT == 0:
-        boss_warning_start = pygame.time.get_ticks()
-    delay_event         = None
-    current_carried_img = None
-    player.carrying     = False
-    x = random.randint(50, WIDTH-150)
-    y = random.randint(50, HEIGHT-150)
-    p = Part((x,y)); parts.add(p); all_sprites.add(p)
-    e = Enemy((WIDTH-15,15)); enemies.add(e); all_sprites.add(e)
-
-def reset_game():
-    global parts, enemies, thieves, chairs
-    global boomerangs, boomerang_projectiles, speed_items, all_sprites
-    global delivered, game_over, delay_event, current_carried_img
-    global last_chair_drop, last_boom_spawn, last_speed_spawn, respawns
-    global boss, boss_warning_start
-
-    delivered            = 0
-    game_over            = False
-    delay_event          = None
-    current_carried_img  = None
-    last_chair_drop      = pygame.time.get_ticks()
-    last_boom_spawn      = pygame.time.get_ticks()
-    last_speed_spawn     = pygame.time.get_ticks()
-    respawns.clear()
-
-    boss                 = None
-    boss_warning_start   = None
-
-    player.carrying        = False
-    player.has_boomerang   = False
-    player.speed_multiplier= 1.0
-    player.boost_end_time  = 0
-    player.rect.center     = (WIDTH//2, HEIGHT//2)
-
-    all_sprites            = pygame.sprite.Group(player, cashier)
-
-    parts                  = pygame.sprite.Group()
-    for _ in range(NUM_PARTS):
-        x = random.randint(50, WIDTH-150)
-        y = random.randint(50, HEIGHT-150)
-        p = Part((x,y)); parts.add(p); all_sprites.add(p)
-
-    enemies                = pygame.sprite.Group()
-    safe_dist              = 150
-    for _ in range(NUM_ENEMIES):
-        while True:
-            ex = random.randint(50, WIDTH-50)
-            ey = random.randint(50, HEIGHT-50)
-            if math.hypot(ex-WIDTH//2, ey-HEIGHT//2) > safe_dist:
-                break
-        e = Enemy((ex,ey)); enemies.add(e); all_sprites.add(e)
-
-    thieves                = pygame.sprite.Group()
-    tx = random.randint(50, WIDTH-50)
-    ty = random.randint(50, HEIGHT-50)
-    t  = Thief((tx,ty)); thieves.add(t); all_sprites.add(t)
-
-    chairs                 = pygame.sprite.Group()
-    boomerangs             = pygame.sprite.Group()
-    boomerang_projectiles  = pygame.sprite.Group()
-    speed_items            = pygame.sprite.Group()
-
-    bx = random.randint(50, WIDTH-50)
-    by = random.randint(50, HEIGHT-50)
-    b  = BoomerangItem((bx,by))
-    boomerangs.add(b); all_sprites.add(b)
-
-# ─── Init & Loop ───────────────────────────────────────────────────────────────
-player  = Player()
-cashier = Cashier((20, HEIGHT-20))
-reset_game()
-
-while True:
-    dt  = clock.tick(FPS)
-    now = pygame.time.get_ticks()
-
-    for ev in pygame.event.get():
-        if ev.type == pygame.QUIT:
-            pygame.quit(); sys.exit()
-        if ev.type == pygame.KEYDOWN:
-            if ev.key == pygame.K_RETURN:
-                if state_intro:
-                    state_intro = False
-                elif game_over:
-                    reset_game()
-            if ev.key == pygame.K_SPACE and player.has_boomerang and not boomerang_projectiles:
-                proj = BoomerangProjectile(player.rect.center)
-                boomerang_projectiles.add(proj); all_sprites.add(proj)
-                player.has_boomerang = False
-
-    if state_intro:
-        scroll_y -= dt * scroll_speed
-        screen.fill((0,0,0))
-        for i, surf in enumerate(intro_surfs):
-            x = (WIDTH - surf.get_width()) // 2
-            y = scroll_y + i*30
-            screen.blit(surf, (x,y))
-        if scroll_y + len(intro_surfs)*30 < 0:
-            state_intro = False
-        pygame.display.flip()
-        continue
-
-    # ── Super Boomer warning & spawn ─────────────────────────────────────────
-    if boss_warning_start is not None:
-        if now - boss_warning_start < WARNING_DURATION:
-            screen.fill((0,0,0))
-            warning = font.render("SUPER BOOMER!", True, (255,0,0))
-            wx = (WIDTH - warning.get_width())//2
-            screen.blit(warning, (wx, HEIGHT//2 - warning.get_height()//2))
-            pygame.display.flip()
-            continue
-        else:
-            # remove existing boss if one exists so it doesn't freeze in placeholder
-            if boss:
-                boss.kill()
-            boss = SuperBoomer()
-            all_sprites.add(boss)
-            boss_warning_start = None
-
-    # ── Game Update ──────────────────────────────────────────────────────────
-    if not game_over:
-        keys    = pygame.key.get_pressed()
-        old_pos = player.rect.topleft
-        player.update(keys)
-
-        # block through chairs/thieves using pixel masks
-        if pygame.sprite.spritecollideany(player, chairs,
-                                          pygame.sprite.collide_mask):
-            player.rect.topleft = old_pos
-        if pygame.sprite.spritecollideany(player, thieves,
-                                          pygame.sprite.collide_mask):
-            player.rect.topleft = old_pos
-
-        # boss collision = death
-        if boss and pygame.sprite.collide_mask(player, boss):
-            game_over = True
-
-        # thief-steal fallback with mask
-        for t in thieves:
-            if (player.carrying and not t.carrying
-                and pygame.sprite.collide_mask(player, t)):
-                t.carrying      = True
-                t.carried_image = current_carried_img
-                player.carrying = False
-                current_carried_img = None
-                t.drop_time = now + random.randint(THIEF_DROP_MIN,THIEF_DROP_MAX)
+# ─── Vectorized Enemies ──────────────────────────────────────────────────────
+class EnemyArrays:
+    """Optional NumPy backend for enemy steering.
+
+    Enemy centers live in a contiguous float array and pursuit plus
+    separation are computed for all enemies at once, with neighbours found
+    through a sorted cell list (cell size MIN_ENEMY_SEPARATION). Rects are
+    written back every frame, rounded, for drawing and collision.
+
+    The steering rules are the same as GameSession.update_enemies(), but moves are
+    applied simultaneously and kept sub-pixel, where the pure-Python loop
+    moves enemies one at a time and truncates through integer rects. From
+    the same state one step agrees to within 1 px per axis for enemies
+    with no close neighbour, and to within 2*ENEMY_SPEED + 1 px in crowds,
+    where earlier enemies in the loop have already moved and can turn the
+    separation push around.
+    """
+    def __init__(self, game):
+        self.game    = game
+        self.sprites = []
+        self.pos     = np.zeros((0, 2))
+        self.vel     = np.zeros((0, 2))
+
+    def sync_members(self):
+        sprites = self.game.enemies.sprites()
+        if sprites == self.sprites:
+            return
+        rows = {s: i for i, s in enumerate(self.sprites)}
+        pos  = np.empty((len(sprites), 2))
+        for k, s in enumerate(sprites):
+            i = rows.get(s)
+            pos[k] = self.pos[i] if i is not None else s.rect.center
+        self.sprites = sprites
+        self.pos     = pos
+        self.vel     = np.zeros_like(pos)
+
+    def spawned(self, sprite):
+        """Start `sprite` from its rect. A recycled enemy can be killed and
+        spawned again between two syncs, which would otherwise leave it
+        its row, and so its position, from its previous life."""
+        try:
+            i = self.sprites.index(sprite)
+        except ValueError:
+            return
+        self.pos[i] = sprite.rect.center
+        self.vel[i] = 0
+
+    def neighbour_pairs(self):
+        """Index pairs (i, j) of enemies in the same or adjacent cells."""
+        n      = len(self.pos)
+        cells  = np.floor(self.pos / MIN_ENEMY_SEPARATION).astype(np.int64)
+        cells -= cells.min(axis=0) - 1
+        rows   = cells[:,1].max() + 2
+        keys   = cells[:,0]*rows + cells[:,1]
+        order  = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        index  = np.arange(n)
+        pairs_i, pairs_j = [], []
+        for ox in (-1, 0, 1):
+            for oy in (-1, 0, 1):
+                nk    = keys + ox*rows + oy
+                lo    = np.searchsorted(sorted_keys, nk, "left")
+                count = np.searchsorted(sorted_keys, nk, "right") - lo
+                total = count.sum()
+                if not total:
+                    continue
+                start = np.repeat(lo - np.cumsum(count) + count, count)
+                pairs_i.append(np.repeat(index, count))
+                pairs_j.append(order[np.arange(total) + start])
+        if not pairs_i:
+            return index[:0], index[:0]
+        return np.concatenate(pairs_i), np.concatenate(pairs_j)
+
+    def update(self, now):
+        self.sync_members()
+        n = len(self.pos)
+        if not n:
+            return
+        pos = self.pos
+
+        # pursuit along the flow field, straight at the player when it's close
+        cells  = (np.clip(pos[:,1] // FLOW_CELL, 0, FLOW_ROWS-1) * FLOW_COLS
+                  + np.clip(pos[:,0] // FLOW_CELL, 0, FLOW_COLS-1)).astype(int)
+        target = self.game.flow.targets()[cells]
+        player = np.array(self.game.player.rect.center, dtype=float)
+        target = np.where(np.isnan(target), player, target)
+        to_target = target - pos
+        dist = np.hypot(to_target[:,0], to_target[:,1])
+        vel  = to_target / np.where(dist > 0, dist, 1)[:,None] * ENEMY_SPEED
+
+        # unit push away from each neighbour closer than the separation
+        i, j  = self.neighbour_pairs()
+        diff  = pos[i] - pos[j]
+        d     = np.hypot(diff[:,0], diff[:,1])
+        close = (d > 0) & (d < MIN_ENEMY_SEPARATION)
+        i, diff, d = i[close], diff[close], d[close]
+        sx = np.bincount(i, diff[:,0]/d, minlength=n)
+        sy = np.bincount(i, diff[:,1]/d, minlength=n)
+        sd = np.hypot(sx, sy)
+        pushed = sd > 0
+        vel[pushed,0] += sx[pushed]/sd[pushed] * ENEMY_SPEED
+        vel[pushed,1] += sy[pushed]/sd[pushed] * ENEMY_SPEED
+
+        pos += vel
+        self.vel = vel
+        centers  = np.rint(pos).astype(int)
+        for s, c in zip(self.sprites, centers.tolist()):
+            s.rect.center = c
+        self.clear_chairs(now, centers)
+
+    def clear_chairs(self, now, centers):
+        reach = (ENEMY_IMAGE.get_width() + CHAIR_IMAGE.get_width()) / 2
+        for c in self.game.chairs.sprites():
+            if now - c.spawn_time < CHAIR_INVINCIBILITY:
+                continue
+            cx, cy = c.rect.center
+            near = np.flatnonzero((np.abs(centers[:,0]-cx) <= reach)
+                                  & (np.abs(centers[:,1]-cy) <= reach))
+            for k in near.tolist():
+                if self.game.collisions.pair(self.sprites[k], c):
+                    c.kill()
+                    break
+
+# ─── Game Session ─────────────────────────────────────────────────────────────
+class GameSession:
+    """One game world: its sprites, clock, timers and RNG.
+
+    Sessions only share read-only assets, so any number of them can run
+    side by side. `clock` defaults to a SimClock.
+    """
+    def __init__(self, seed=None, clock=None):
+        self.seed         = seed if seed is not None else random.randrange(2**63)
+        self.clock        = clock or SimClock()
+        self.rng          = random.Random(self.seed)
+        self.scheduler    = Scheduler()
+        self.enemy_grid   = SpatialHash(MIN_ENEMY_SEPARATION)
+        self.collisions   = Collisions(self)
+        self.flow         = FlowField()
+        self.placement    = Placement(self)
+        self.enemy_arrays = None   # set to an EnemyArrays(self) to use the NumPy backend
+        self.player       = Player(self)
+        self.cashier      = Cashier((20, HEIGHT-20))
+        self.all_sprites  = EntityGroup(draw=True)
+        # keyed by the group their sprites go in; see spawn()
+        self.pools = {
+            "parts":   EntityPool(functools.partial(Part, self)),
+            "enemies": EntityPool(Enemy),
+            "chairs":  EntityPool(functools.partial(Chair, self)),
+            "boomerang_projectiles":
+                EntityPool(functools.partial(BoomerangProjectile, self)),
+        }
+        self.reset()
+
+    def ticks(self):
+        return self.clock.ticks()
+
+    def spawn(self, group, *args):
+        """Take a sprite from the pool for `group` and add it to `group`
+        and all_sprites."""
+        sprite = self.pools[group].acquire(*args)
+        getattr(self, group).add(sprite)
+        self.all_sprites.add(sprite)
+        self.collisions.added(sprite, group)
+        if self.enemy_arrays and group == "enemies":
+            self.enemy_arrays.spawned(sprite)
+        return sprite
+
+    def pool_stats(self):
+        return {name: pool.stats() for name, pool in self.pools.items()}
+
+    def reset(self, seed=None):
+        """Start a new game; reseeds the RNG first when `seed` is given."""
+        if seed is not None:
+            self.seed = seed
+            self.rng.seed(seed)
+        self.empty_groups()
+        self.all_sprites.add(self.player, self.cashier)
+
+        self.delivered           = 0
+        self.game_over           = False
+        self.delay_event         = None
+        self.current_carried_img = None
+
+        now = self.ticks()
+        self.scheduler.clear()
+        self.scheduler.call_every(CHAIR_DROP_INTERVAL,       self.drop_chairs,       now)
+        self.scheduler.call_every(BOOMERANG_SPAWN_INTERVAL,  self.spawn_boomerang,   now)
+        self.scheduler.call_every(SPEEDBOOST_SPAWN_INTERVAL, self.spawn_speed_boost, now)
+
+        self.boss               = None
+        self.boss_warning_start = None
+        self.bosses_spawned     = 0
+        self.boss_kills         = 0
+
+        player = self.player
+        player.carrying         = False
+        player.has_boomerang    = False
+        player.speed_multiplier = 1.0
+        player.boost_end_time   = 0
+        player.boost_timer      = None
+        player.rect.center      = (WIDTH//2, HEIGHT//2)
+        self.placement.invalidate()
+
+        place = self.placement.spot
+        for _ in range(NUM_PARTS):
+            self.spawn("parts", place(50, 150))
+        for _ in range(NUM_ENEMIES):
+            self.spawn("enemies", place(away=player.rect.center,
+                                        distance=SPAWN_SAFE_DIST))
+        t = Thief(self, place()); self.thieves.add(t); self.all_sprites.add(t)
+        b = BoomerangItem(place())
+        self.boomerangs.add(b); self.all_sprites.add(b)
+
+    def empty_groups(self):
+        """Kill every sprite, handing pooled ones back for reuse, and start
+        over with empty groups; the player and cashier are left out too."""
+        for s in self.all_sprites:
+            s.kill()
+        self.all_sprites           = EntityGroup(draw=True)
+        self.parts                 = PartGroup()
+        self.enemies               = EntityGroup()
+        self.thieves               = EntityGroup()
+        self.chairs                = ChairGroup()
+        self.boomerangs            = EntityGroup()
+        self.boomerang_projectiles = EntityGroup()
+        self.speed_items           = EntityGroup()
+
+    def update(self, now, keys, aim=(0,0), throw=False):
+        """Advance the game by one frame. `keys` is indexable by pygame key codes."""
+        if throw and self.player.has_boomerang and not self.boomerang_projectiles:
+            self.spawn("boomerang_projectiles", self.player.rect.center, aim)
+            self.player.has_boomerang = False
+
+        # ── Timers (spawns, drops, respawns, boss states) ───────────────────
+        if not self.game_over:
+            self.scheduler.run(now)
+        profiler.lap("timers")
+
+        # ── Super Boomer warning: the world holds still until spawn_boss fires
+        if self.boss_warning_start is not None:
+            return
+
+        # ── Game Update ──────────────────────────────────────────────────────
+        if not self.game_over:
+            collisions = self.collisions
+            collisions.begin()
+            old_pos = self.player.rect.topleft
+            self.player.update(keys)
+
+            # block through chairs/thieves using pixel masks
+            if collisions.first(self.player, "chairs"):
+                self.player.rect.topleft = old_pos
+            if collisions.first(self.player, "thieves"):
+                self.player.rect.topleft = old_pos
+
+            # boss collision = death
+            # swept along the boss's last move, so a sprint can't skip past
+            if self.boss and collisions.swept_pair(self.boss, self.player,
+                                                   self.boss.moved_from, critical=True):
+                self.game_over = True
+
+            # thief-steal fallback with mask
+            for t in collisions.colliding(self.player, "thieves"):
+                if self.player.carrying and not t.carrying:
+                    self.player.carrying = False
+                    t.steal(self.current_carried_img, now)
+                    self.current_carried_img = None
+            profiler.lap("player")
+
+            # update enemies & clear chairs
+            self.update_enemies(now)
+            collisions.refile("enemies")
+            profiler.lap("enemies")
+
+            # update thieves
+            for t in self.thieves:
+                t.update()
+            profiler.lap("thieves")
+
+            # pickup parts
+            if not self.player.carrying:
+                hit = collisions.first(self.player, "parts")
+                if hit:
+                    self.current_carried_img = hit.image
+                    hit.kill()
+                    self.player.carrying = True
+            else:
+                if self.delay_event is None and pygame.sprite.collide_rect(self.player,self.cashier):
+                    if self.rng.random() < LINE_PROBABILITY:
+                        self.delay_event = {
+                            'start_time': now,
+                            'next_available_time': now + COME_BACK_DELAY
+                        }
+                    else:
+                        self.handle_delivery()
+                elif self.delay_event and pygame.sprite.collide_rect(self.player,self.cashier):
+                    elapsed = now - self.delay_event['start_time']
+                    if elapsed >= WAIT_TIME or now >= self.delay_event['next_available_time']:
+                        self.handle_delivery()
+            profiler.lap("pickup")
+
+            # pickup boomerang & move projectiles
+            if not self.player.has_boomerang and not self.boomerang_projectiles:
+                hit_b = collisions.first(self.player, "boomerangs")
+                if hit_b:
+                    self.player.has_boomerang = True
+                    hit_b.kill()
+
+            for proj in self.boomerang_projectiles:
+                proj.update()
+            profiler.lap("boomerang")
+
+            # pickup speed-boost
+            hit_sb = collisions.first(self.player, "speed_items")
+            if hit_sb:
+                hit_sb.kill()
+                self.player.boost(now)
+            profiler.lap("speed_boost")
+
+            # update boss
+            if self.boss:
+                self.boss.update()
+
+            # game over
+            if collisions.first(self.player, "enemies", critical=True):
+                self.game_over = True
+            profiler.lap("boss")
+
+    def observe(self):
+        """Plain-data view of the world for policies and logs."""
+        player, boss = self.player, self.boss
+        return {
+            "time":          self.ticks(),
+            "score":         self.delivered,
+            "game_over":     self.game_over,
+            "warning":       self.boss_warning_start is not None,
+            "player":        player.rect.center,
+            "carrying":      player.carrying,
+            "has_boomerang": player.has_boomerang,
+            "boosted":       self.ticks() < player.boost_end_time,
+            "cashier":       self.cashier.rect.center,
+            "parts":         [p.rect.center for p in self.parts],
+            "enemies":       [e.rect.center for e in self.enemies],
+            "thieves":       [t.rect.center for t in self.thieves],
+            "chairs":        [c.rect.center for c in self.chairs],
+            "boomerangs":    [b.rect.center for b in self.boomerangs],
+            "speed_items":   [s.rect.center for s in self.speed_items],
+            "boss":          boss.rect.center if boss else None,
+            "boss_health":   boss.health if boss else 0,
+        }
+
+    def handle_delivery(self):
+        self.delivered += 1
+        if self.delivered % 10 == 0:
+            new_thief = Thief(self, self.placement.spot())
+            self.thieves.add(new_thief); self.all_sprites.add(new_thief)
+        # trigger boss warning
+        if self.delivered % BOSS_SPAWN_COUNT == 0:
+            self.boss_warning_start = self.ticks()
+            self.scheduler.call_at(self.boss_warning_start + WARNING_DURATION,
+                                   self.spawn_boss)
+        self.delay_event         = None
+        self.current_carried_img = None
+        self.player.carrying     = False
+        self.spawn("parts", self.placement.spot(50, 150))
+        self.spawn("enemies", (WIDTH-15,15))
+
+    def spawn_boss(self, now):
+        # remove existing boss if one exists so it doesn't freeze in placeholder
+        if self.boss:
+            self.boss.kill()
+        self.boss = SuperBoomer(self)
+        self.all_sprites.add(self.boss)
+        self.bosses_spawned += 1
+        self.boss_warning_start = None
+
+    def drop_chairs(self, now):
+        for e in self.enemies:
+            if self.rng.random() < CHAIR_DROP_CHANCE:
+                self.spawn("chairs", e.rect.center)
+
+    def spawn_boomerang(self, now):
+        if (self.rng.random() < BOOMERANG_SPAWN_CHANCE
+            and not self.boomerangs and not self.player.has_boomerang):
+            b = BoomerangItem(self.placement.spot())
+            self.boomerangs.add(b); self.all_sprites.add(b)
+
+    def spawn_speed_boost(self, now):
+        if self.rng.random() < SPEEDBOOST_SPAWN_CHANCE and not self.speed_items:
+            sb = SpeedBoostItem(self.placement.spot())
+            self.speed_items.add(sb); self.all_sprites.add(sb)
+
+    def respawn_enemy(self, now):
+        self.spawn("enemies", self.placement.spot(away=self.player.rect.center,
+                                                  distance=SPAWN_SAFE_DIST))
+
+    def update_enemies(self, now):
+        self.flow.update(self.player.rect.center, self.chairs)
+        profiler.lap("flow")
+        if self.enemy_arrays:
+            self.enemy_arrays.update(now)
+            return
 
-        # update enemies & clear chairs
-        for e in enemies:
-            dx, dy = player.rect.centerx-e.rect.centerx, player.rect.centery-e.rect.centery
-            nx, ny = normalize(dx, dy)
+        # the grid is rebuilt once per frame, then enemies are moved incrementally
+        self.enemy_grid.rebuild(self.enemies)
+
+        for e in self.enemies:
+            ex, ey = e.rect.center
+            tx, ty = self.flow.heading(ex, ey) or self.player.rect.center
+            nx, ny = normalize(tx-ex, ty-ey)
             mvx, mvy = nx*ENEMY_SPEED, ny*ENEMY_SPEED
             sx = sy = 0
-            for o in enemies:
+            for o in self.enemy_grid.near(ex, ey, MIN_ENEMY_SEPARATION):
                 if o is not e:
-                    dx2, dy2 = e.rect.centerx-o.rect.centerx, e.rect.centery-o.rect.centery
+                    dx2, dy2 = ex-o.rect.centerx, ey-o.rect.centery
                     d = math.hypot(dx2, dy2)
                     if 0 < d < MIN_ENEMY_SEPARATION:
                         rx, ry = dx2/d, dy2/d
@@ -590,176 +1892,986 @@ while True:
 
             e.rect.x += mvx
             e.rect.y += mvy
+            self.enemy_grid.move(e)
 
-            hit_chair = pygame.sprite.spritecollideany(e, chairs,
-                                                      pygame.sprite.collide_mask)
+            hit_chair = self.collisions.first(e, "chairs")
             if hit_chair and now - hit_chair.spawn_time >= CHAIR_INVINCIBILITY:
                 hit_chair.kill()
 
-        # drop chairs
-        if now - last_chair_drop >= CHAIR_DROP_INTERVAL:
-            for e in enemies:
-                if random.random() < CHAIR_DROP_CHANCE:
-                    chair = Chair(e.rect.center)
-                    chairs.add(chair); all_sprites.add(chair)
-            last_chair_drop = now
-
-        # update thieves
-        for t in thieves:
-            t.update()
-
-        # pickup parts
-        if not player.carrying:
-            hit = pygame.sprite.spritecollideany(player, parts,
-                                                pygame.sprite.collide_mask)
-            if hit:
-                current_carried_img = hit.image
-                hit.kill()
-                player.carrying = True
-        else:
-            if delay_event is None and pygame.sprite.collide_rect(player,cashier):
-                if random.random() < LINE_PROBABILITY:
-                    delay_event = {
-                        'start_time': now,
-                        'next_available_time': now + COME_BACK_DELAY
-                    }
-                else:
-                    handle_delivery()
-            elif delay_event and pygame.sprite.collide_rect(player,cashier):
-                elapsed = now - delay_event['start_time']
-                if elapsed >= WAIT_TIME or now >= delay_event['next_available_time']:
-                    handle_delivery()
-
-        # spawn/pickup boomerang
-        if now - last_boom_spawn >= BOOMERANG_SPAWN_INTERVAL:
-            if (random.random() < BOOMERANG_SPAWN_CHANCE
-                and not boomerangs and not player.has_boomerang):
-                bx, by = (random.randint(50,WIDTH-50),
-                          random.randint(50,HEIGHT-50))
-                b = BoomerangItem((bx,by))
-                boomerangs.add(b); all_sprites.add(b)
-            last_boom_spawn = now
-
-        if not player.has_boomerang and not boomerang_projectiles:
-            hit_b = pygame.sprite.spritecollideany(player, boomerangs,
-                                                  pygame.sprite.collide_mask)
-            if hit_b:
-                player.has_boomerang = True
-                hit_b.kill()
-
-        for proj in boomerang_projectiles:
-            proj.update()
-
-        # spawn/pickup speed-boost
-        if now - last_speed_spawn >= SPEEDBOOST_SPAWN_INTERVAL:
-            if random.random() < SPEEDBOOST_SPAWN_CHANCE and not speed_items:
-                sx, sy = (random.randint(50,WIDTH-50),
-                          random.randint(50,HEIGHT-50))
-                sb = SpeedBoostItem((sx,sy))
-                speed_items.add(sb); all_sprites.add(sb)
-            last_speed_spawn = now
-
-        hit_sb = pygame.sprite.spritecollideany(player, speed_items,
-                                                pygame.sprite.collide_mask)
-        if hit_sb:
-            hit_sb.kill()
-            player.speed_multiplier = SPEEDBOOST_MULTIPLIER
-            player.boost_end_time   = now + SPEEDBOOST_DURATION
-
-        # respawn enemies
-        for ts in respawns[:]:
-            if now >= ts:
-                while True:
-                    ex = random.randint(50,WIDTH-50)
-                    ey = random.randint(50,HEIGHT-50)
-                    if math.hypot(ex-player.rect.centerx,
-                                  ey-player.rect.centery)>150:
-                        break
-                new_e = Enemy((ex,ey))
-                enemies.add(new_e); all_sprites.add(new_e)
-                respawns.remove(ts)
-
-        # update boss
-        if boss:
-            boss.update()
+# ─── HUD Cache ───────────────────────────────────────────────────────────────
+class HudCache:
+    """Retained HUD surfaces, rebuilt only when their inputs change.
 
-        # game over
-        if pygame.sprite.spritecollideany(player, enemies,
-                                          pygame.sprite.collide_mask):
-            game_over = True
+    In steady state every lookup is a hit and no surface is allocated; the
+    hit rate shows up in the profiler overlay.
+    """
+    def __init__(self):
+        self.entries = {}
+        self.hits    = 0
+        self.misses  = 0
+
+    def text(self, name, fmt, color, *args):
+        """`fmt` formatted with `args`, rendered in the HUD font."""
+        entry = self.entries.get(name)
+        if entry and entry[0] == (fmt, color, args):
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        surf = font.render(fmt.format(*args), True, color)
+        self.entries[name] = ((fmt, color, args), surf)
+        return surf
+
+    def scaled(self, image, size):
+        key   = ("scaled", image, size)
+        entry = self.entries.get(key)
+        if entry:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        surf = pygame.transform.scale(image, size)
+        self.entries[key] = (None, surf)
+        return surf
+
+    def panel(self, size, color):
+        """A filled, possibly translucent, rectangle surface."""
+        key   = ("panel", size, color)
+        entry = self.entries.get(key)
+        if entry:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        surf = pygame.Surface(size, pygame.SRCALPHA)
+        surf.fill(color)
+        self.entries[key] = (None, surf)
+        return surf
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 1.0
+
+hud_cache = HudCache()
+
+# ─── Frame Profiler ──────────────────────────────────────────────────────────
+class FrameProfiler:
+    """Per-phase frame timings and entity counts kept in a ring buffer.
+
+    Call begin_frame(), then lap(phase) as each phase of the frame finishes,
+    then end_frame(). Laps are no-ops while the profiler is disabled.
+    """
+    PHASES = ("events", "timers", "player", "flow", "enemies", "thieves",
+              "pickup", "boomerang", "speed_boost", "boss", "render")
+    COUNTS = ("enemies", "chairs", "thieves", "parts", "projectiles")
+    PAIRS  = ("candidates", "overlaps", "hits")
+
+    def __init__(self, history=PROFILE_HISTORY):
+        self.frames    = collections.deque(maxlen=history)
+        self.enabled   = False
+        self.overlay   = False
+        self.current   = {}
+        self._mark     = 0.0
+        self._lines    = []
+        self._stale_in = 0
+
+    def begin_frame(self):
+        if self.enabled:
+            self.current = {}
+            self._mark   = time.perf_counter()
+
+    def lap(self, phase):
+        if self.enabled:
+            t = time.perf_counter()
+            self.current[phase] = self.current.get(phase, 0.0) + (t-self._mark)*1000
+            self._mark = t
+
+    def end_frame(self, game):
+        if not self.enabled:
+            return
+        row = {p: self.current.get(p, 0.0) for p in self.PHASES}
+        row["total"] = sum(row.values())
+        row.update(zip(("n_" + c for c in self.COUNTS),
+                       (len(game.enemies), len(game.chairs), len(game.thieves),
+                        len(game.parts), len(game.boomerang_projectiles))))
+        row.update(game.collisions.counts())
+        self.frames.append(row)
+
+    def percentiles(self, key, qs=(50, 95, 99)):
+        values = sorted(f[key] for f in self.frames)
+        if not values:
+            return [0.0 for _ in qs]
+        return [values[min(len(values)-1, len(values)*q // 100)] for q in qs]
+
+    def toggle_overlay(self):
+        self.overlay = not self.overlay
+        self.enabled = self.enabled or self.overlay
+        self._stale_in = 0
+
+    def draw(self, surface, game):
+        """Draw the p50/p95/p99 table; returns the rects touched."""
+        if self._stale_in <= 0:
+            rows = [f"{'phase':<12}{'p50':>7}{'p95':>7}{'p99':>7}"]
+            for key in self.PHASES + ("total",):
+                rows.append(f"{key:<12}" + "".join(
+                    f"{v:>7.2f}" for v in self.percentiles(key)))
+            last = self.frames[-1] if self.frames else {}
+            rows.append(" ".join(f"{c}:{last.get('n_' + c, 0)}"
+                                 for c in self.COUNTS))
+            rows.append("pairs " + " ".join(f"{p}:{last.get(p, 0)}"
+                                            for p in self.PAIRS))
+            rows.append(f"hud cache hit rate {hud_cache.hit_rate():.1%}")
+            rows.append(f"quality {governor.LEVELS[governor.level]}, "
+                        f"{len(governor.changes)} changes")
+            rows.append(f"spawn queries {game.placement.queries}, "
+                        f"fallbacks {game.placement.fallbacks}")
+            rows.append(f"flow recomputes {game.flow.recomputes}, "
+                        f"last {game.flow.last_ms:.2f} ms")
+            rows.append("pools live/high " + " ".join(
+                f"{name[:5]}:{p['live']}/{p['high_water']}"
+                for name, p in game.pool_stats().items()))
+            self._lines    = [profile_font.render(r, True, TEXT_COLOR)
+                              for r in rows]
+            self._stale_in = PROFILE_OVERLAY_REFRESH
+        self._stale_in -= 1
+
+        width  = max(s.get_width() for s in self._lines) + 12
+        height = len(self._lines) * 16 + 8
+        x, y   = WIDTH - width - 10, 10
+        drawn  = [surface.fill((0,0,0), (x, y, width, height))]
+        for i, line in enumerate(self._lines):
+            drawn.append(surface.blit(line, (x+6, y+4+i*16)))
+        return drawn
+
+    def dump(self, path):
+        """Write the buffered frames to `path` as .json or .csv."""
+        frames = list(self.frames)
+        with open(path, "w", newline="") as fh:
+            if path.endswith(".json"):
+                json.dump(frames, fh, indent=1)
+            else:
+                fields = (list(self.PHASES) + ["total"]
+                          + ["n_" + c for c in self.COUNTS] + list(self.PAIRS))
+                writer = csv.DictWriter(fh, fieldnames=fields)
+                writer.writeheader()
+                writer.writerows(frames)
+        return len(frames)
+
+profiler = FrameProfiler()
+
+# ─── Rendering ───────────────────────────────────────────────────────────────
+class Interpolator:
+    """Draws sprites part of the way between their last two ticks.
+
+    capture() before the final tick of a frame records where every sprite
+    was; apply(alpha) moves each sprite's rect `alpha` of the way from
+    there to where it is now, and restore() puts the simulated positions
+    back once the frame is drawn. Moves longer than INTERP_SNAP (respawns,
+    a new game) are drawn where they landed.
+    """
+    def __init__(self):
+        self.previous = {}
+        self.moved    = []
+
+    def capture(self, game):
+        self.previous = {s: s.rect.topleft for s in game.all_sprites}
+
+    def apply(self, game, alpha):
+        for s in game.all_sprites:
+            was = self.previous.get(s)
+            if was is None:
+                continue
+            x, y = s.rect.topleft
+            dx, dy = x - was[0], y - was[1]
+            if (dx or dy) and abs(dx) + abs(dy) <= INTERP_SNAP:
+                self.moved.append((s, x, y))
+                s.rect.topleft = (round(x - dx*(1-alpha)), round(y - dy*(1-alpha)))
+
+    def restore(self):
+        for s, x, y in self.moved:
+            s.rect.topleft = (x, y)
+        self.moved.clear()
+
+def render(game, now):
+    if game.boss_warning_start is not None:
+        screen.fill((0,0,0))
+        warning = hud_cache.text("warning", "SUPER BOOMER!", (255,0,0))
+        wx = (WIDTH - warning.get_width())//2
+        screen.blit(warning, (wx, HEIGHT//2 - warning.get_height()//2))
+        return
 
-    # ── Render ─────────────────────────────────────────────────────────────────
     screen.blit(background, (0,0))
+    draw_scene(game, now)
 
-    for part in parts:
-        glow_rect = part.glow.get_rect(center=part.rect.center)
-        screen.blit(part.glow, glow_rect)
-    for chair in chairs:
-        glow_rect = chair.glow.get_rect(center=chair.rect.center)
-        screen.blit(chair.glow, glow_rect)
-    for b in boomerangs:
-        glow_rect = b.glow.get_rect(center=b.rect.center)
-        screen.blit(b.glow, glow_rect)
-    for sb in speed_items:
-        glow_rect = sb.glow.get_rect(center=sb.rect.center)
-        screen.blit(sb.glow, glow_rect)
-
-    all_sprites.draw(screen)
+def draw_scene(game, now):
+    """Draw everything above the background; returns the rects touched."""
+    drawn = []
+    mark  = drawn.append
+
+    for group in (game.parts, game.chairs, game.boomerangs, game.speed_items):
+        if not governor.glows:
+            break
+        for s in group:
+            mark(screen.blit(s.glow, s.glow.get_rect(center=s.rect.center)))
+
+    drawn.extend(screen.blits([(s.image, s.rect) for s in game.all_sprites]))
 
     # thief-carried part above head
-    for t in thieves:
+    for t in game.thieves:
         if t.carrying and t.carried_image:
             tx = t.rect.centerx - t.carried_image.get_width()//2
             ty = t.rect.top - t.carried_image.get_height() - 5
-            screen.blit(t.carried_image, (tx, ty))
+            mark(screen.blit(t.carried_image, (tx, ty)))
 
     # player-carried part above head
-    if player.carrying and current_carried_img:
-        px = player.rect.centerx - current_carried_img.get_width()//2
-        py = player.rect.top - current_carried_img.get_height() - 5
-        screen.blit(current_carried_img, (px, py))
+    if game.player.carrying and game.current_carried_img:
+        px = game.player.rect.centerx - game.current_carried_img.get_width()//2
+        py = game.player.rect.top - game.current_carried_img.get_height() - 5
+        mark(screen.blit(game.current_carried_img, (px, py)))
 
     # draw boss health bar
-    if boss:
+    if game.boss:
         bar_w, bar_h = 200, 20
         bx = (WIDTH - bar_w)//2
         by = HEIGHT - bar_h - 10
-        pygame.draw.rect(screen, BOSS_BAR_BG, (bx,by,bar_w,bar_h))
-        fill = int(bar_w * boss.health / BOSS_HIT_POINTS)
-        pygame.draw.rect(screen, BOSS_BAR_FILL, (bx,by,fill,bar_h))
-
-    hud = font.render(f"Score: {delivered}", True, TEXT_COLOR)
-    screen.blit(hud, (10,10))
-
-    if player.has_boomerang:
-        icon = pygame.transform.scale(BOOMERANG_IMAGE, (24,24))
-        screen.blit(icon, (10 + hud.get_width()+10, 8))
-    if pygame.time.get_ticks() < player.boost_end_time:
-        sb_icon = pygame.transform.scale(NOS_IMAGE, (24,24))
-        screen.blit(sb_icon, (10 + hud.get_width()+40, 8))
-
-    if delay_event and player.carrying and pygame.sprite.collide_rect(player,cashier):
-        banner = pygame.Surface((WIDTH,80), pygame.SRCALPHA)
-        banner.fill((0,0,0,180))
-        screen.blit(banner, (0, HEIGHT//2-40))
-        elapsed   = now - delay_event['start_time']
+        mark(pygame.draw.rect(screen, BOSS_BAR_BG, (bx,by,bar_w,bar_h)))
+        fill = int(bar_w * game.boss.health / BOSS_HIT_POINTS)
+        mark(pygame.draw.rect(screen, BOSS_BAR_FILL, (bx,by,fill,bar_h)))
+
+    hud = hud_cache.text("score", "Score: {}", TEXT_COLOR, game.delivered)
+    mark(screen.blit(hud, (10,10)))
+
+    if game.player.has_boomerang:
+        icon = hud_cache.scaled(BOOMERANG_IMAGE, (24,24))
+        mark(screen.blit(icon, (10 + hud.get_width()+10, 8)))
+    if now < game.player.boost_end_time:
+        sb_icon = hud_cache.scaled(NOS_IMAGE, (24,24))
+        mark(screen.blit(sb_icon, (10 + hud.get_width()+40, 8)))
+
+    player = game.player
+    if (game.delay_event and player.carrying
+        and pygame.sprite.collide_rect(player, game.cashier)):
+        banner = hud_cache.panel((WIDTH,80), (0,0,0,180))
+        mark(screen.blit(banner, (0, HEIGHT//2-40)))
+        elapsed   = now - game.delay_event['start_time']
         remaining = max(0, WAIT_TIME- elapsed)
         secs      = (remaining+999)//1000
-        msg       = font.render(f"Long line… wait {secs}s or leave & return",
-                                True, LONG_LINE_COLOR)
+        msg       = hud_cache.text("long_line",
+                                   "Long line… wait {}s or leave & return",
+                                   LONG_LINE_COLOR, secs)
         mx = WIDTH//2 - msg.get_width()//2
         my = HEIGHT//2 - msg.get_height()//2
-        screen.blit(msg, (mx, my))
+        mark(screen.blit(msg, (mx, my)))
         bx2, by2 = WIDTH//2-150, my+msg.get_height()+10
-        pygame.draw.rect(screen,(100,100,100),(bx2, by2, 300,20))
+        mark(pygame.draw.rect(screen,(100,100,100),(bx2, by2, 300,20)))
         prog = min(1, elapsed/WAIT_TIME)
-        pygame.draw.rect(screen,LONG_LINE_COLOR,(bx2,by2,300*prog,20))
+        mark(pygame.draw.rect(screen,LONG_LINE_COLOR,(bx2,by2,300*prog,20)))
 
-    if game_over:
-        over = font.render("Game Over! You got caught! Press ENTER to restart.",
-                           True, TEXT_COLOR)
+    if game.game_over:
+        over = hud_cache.text("game_over",
+                              "Game Over! You got caught! Press ENTER to restart.",
+                              TEXT_COLOR)
         ox = WIDTH//2 - over.get_width()//2
         oy = HEIGHT//2
-        screen.blit(over, (ox, oy))
+        mark(screen.blit(over, (ox, oy)))
+
+    if profiler.overlay:
+        drawn.extend(profiler.draw(screen, game))
+
+    return drawn
+
+def render_intro():
+    screen.fill((0,0,0))
+    for i, surf in enumerate(intro_surfs):
+        x = (WIDTH - surf.get_width()) // 2
+        y = scroll_y + i*30
+        screen.blit(surf, (x,y))
+
+def run_intro(render_fps):
+    """Play the intro crawl until it scrolls away or ENTER is pressed."""
+    global state_intro, scroll_y
+    while state_intro:
+        dt = clock.tick(render_fps)
+        for ev in pygame.event.get():
+            if ev.type == pygame.QUIT:
+                pygame.quit(); sys.exit()
+            if ev.type == pygame.KEYDOWN and ev.key == pygame.K_RETURN:
+                state_intro = False
+        scroll_y -= dt * scroll_speed
+        render_intro()
+        if scroll_y + len(intro_surfs)*30 < 0:
+            state_intro = False
+        pygame.display.flip()
+
+# ─── Dirty-Rect Renderer ─────────────────────────────────────────────────────
+class DirtyRectRenderer:
+    """Redraws only the regions that changed since the last frame.
+
+    Every rect drawn last frame is restored from the background, the scene
+    is drawn on top, and old plus new rects are pushed to the display. When
+    the dirty share of the screen passes `threshold`, or the frame isn't the
+    normal scene (boss warning), it falls back to a full redraw and flip.
+    """
+    def __init__(self, threshold=DIRTY_FULL_REDRAW_FRACTION):
+        self.threshold     = threshold * WIDTH * HEIGHT
+        self.previous      = []
+        self.full_next     = True
+        self.full_frames   = 0
+        self.dirty_frames  = 0
+
+    def invalidate(self):
+        self.full_next = True
+
+    def present(self, game, now):
+        if game.boss_warning_start is not None:
+            render(game, now)
+            pygame.display.flip()
+            self.full_frames += 1
+            self.full_next = True
+            return
+
+        restore = sum(r.w*r.h for r in self.previous)
+        if self.full_next or restore > self.threshold:
+            screen.blit(background, (0,0))
+        else:
+            for r in self.previous:
+                screen.blit(background, r, r)
+        drawn = draw_scene(game, now)
+        dirty = self.previous + drawn
 
-    pygame.display.flip()
+        if self.full_next or restore + sum(r.w*r.h for r in drawn) > self.threshold:
+            pygame.display.flip()
+            self.full_frames += 1
+        else:
+            pygame.display.update(dirty)
+            self.dirty_frames += 1
+        self.previous  = drawn
+        self.full_next = False
+
+# ─── Quality Governor ────────────────────────────────────────────────────────
+class QualityGovernor:
+    """Sheds rendering and collision cost while frames run over budget.
+
+    feed() takes each frame's work time (clock.get_rawtime(), so time spent
+    waiting on the render cap doesn't count). Every QUALITY_WINDOW frames
+    it compares the mean against QUALITY_BUDGET_MS: over budget it steps
+    one level down right away, and under QUALITY_HEADROOM of it it steps
+    one level up once QUALITY_HOLD frames have passed since the last
+    change. Each level keeps the cuts of the ones before it, and every
+    change is logged to stderr and kept in `changes`.
+    """
+    LEVELS = ("full", "no glow", "rect collisions", "half-rate render")
+
+    def __init__(self, budget_ms=QUALITY_BUDGET_MS):
+        self.budget_ms = budget_ms
+        self.level     = 0
+        self.window    = []
+        self.since     = 0
+        self.skip      = False
+        self.changes   = []   # (game ms, old level, new level, mean frame ms)
+
+    @property
+    def glows(self):
+        return self.level < 1
+
+    @property
+    def coarse_collisions(self):
+        return self.level >= 2
+
+    def should_render(self):
+        """False every other frame at the half-rate level."""
+        self.skip = self.level >= 3 and not self.skip
+        return not self.skip
+
+    def feed(self, frame_ms, now):
+        self.since += 1
+        self.window.append(frame_ms)
+        if len(self.window) < QUALITY_WINDOW:
+            return
+        mean = sum(self.window) / len(self.window)
+        self.window.clear()
+        if mean > self.budget_ms and self.level < len(self.LEVELS)-1:
+            self.change(self.level + 1, mean, now)
+        elif (mean < self.budget_ms * QUALITY_HEADROOM and self.level > 0
+              and self.since >= QUALITY_HOLD):
+            self.change(self.level - 1, mean, now)
+
+    def change(self, level, mean, now):
+        print(f"quality {self.LEVELS[self.level]} -> {self.LEVELS[level]} "
+              f"at {now/1000:.1f}s: mean frame {mean:.2f} ms, "
+              f"budget {self.budget_ms:.2f} ms", file=sys.stderr)
+        self.changes.append((now, self.level, level, mean))
+        self.level = level
+        self.since = 0
+
+governor = QualityGovernor()
+
+# ─── Headless Simulation ─────────────────────────────────────────────────────
+def bot_policy(game, now):
+    """Scripted player: fetch the nearest part and deliver it, steering away
+    from nearby enemies and throwing the boomerang at close ones."""
+    keys = collections.defaultdict(bool)
+    px, py = game.player.rect.center
+    if game.player.carrying:
+        tx, ty = game.cashier.rect.center
+    elif game.parts:
+        tx, ty = min((p.rect.center for p in game.parts),
+                     key=lambda c: (c[0]-px)**2 + (c[1]-py)**2)
+    else:
+        tx, ty = px, py
+    vx, vy = normalize(tx-px, ty-py)
+    for e in list(game.enemies) + ([game.boss] if game.boss else []):
+        ax, ay = px-e.rect.centerx, py-e.rect.centery
+        d = math.hypot(ax, ay)
+        if 0 < d < 120:
+            vx += ax/d * (120-d)/40
+            vy += ay/d * (120-d)/40
+    if vx < -0.3: keys[pygame.K_LEFT]  = True
+    if vx >  0.3: keys[pygame.K_RIGHT] = True
+    if vy < -0.3: keys[pygame.K_UP]    = True
+    if vy >  0.3: keys[pygame.K_DOWN]  = True
+
+    aim, throw = (0,0), False
+    targets = list(game.enemies) + ([game.boss] if game.boss else [])
+    if game.player.has_boomerang and targets:
+        near = min(targets, key=lambda e: (e.rect.centerx-px)**2
+                                        + (e.rect.centery-py)**2)
+        aim   = near.rect.center
+        throw = math.hypot(aim[0]-px, aim[1]-py) < 200
+    return keys, aim, throw
+
+def run_headless(game, duration_ms, policy=bot_policy, step_ms=TICK_MS,
+                 restart=False):
+    """Simulate `duration_ms` of play on `game`, which must be on a
+    SimClock, without rendering.
+
+    Returns the scores of every game played; when `restart` is False the
+    simulation stops at the first game over.
+    """
+    scores = []
+    while game.ticks() < duration_ms:
+        now = game.clock.advance(step_ms)
+        profiler.begin_frame()
+        keys, aim, throw = policy(game, now)
+        profiler.lap("events")
+        game.update(now, keys, aim, throw)
+        profiler.end_frame(game)
+        if game.game_over:
+            scores.append(game.delivered)
+            if not restart:
+                return scores
+            game.reset()
+    scores.append(game.delivered)
+    return scores
+
+class GameBatch:
+    """N independent sessions stepped in lockstep on their own SimClocks.
+
+    An action is a (keys, aim, throw) tuple, as bot_policy() returns, or
+    None for no input. A session that reaches game over stops advancing,
+    with its done flag set, until it is reset.
+    """
+    def __init__(self, n, seed=None, step_ms=TICK_MS):
+        seeds         = random.Random(seed)
+        self.sessions = [GameSession(seeds.randrange(2**63)) for _ in range(n)]
+        self.step_ms  = step_ms
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def reset(self, indices=None):
+        """Start new games in the given sessions (default all); returns the
+        observations of every session."""
+        for i in range(len(self)) if indices is None else indices:
+            self.sessions[i].reset()
+        return [g.observe() for g in self.sessions]
+
+    def step(self, actions):
+        """Advance every live session by one step; returns
+        (observations, scores, dones)."""
+        idle = (collections.defaultdict(bool), (0,0), False)
+        for game, action in zip(self.sessions, actions):
+            if game.game_over:
+                continue
+            keys, aim, throw = action or idle
+            game.update(game.clock.advance(self.step_ms), keys, aim, throw)
+        return ([g.observe() for g in self.sessions],
+                [g.delivered for g in self.sessions],
+                [g.game_over for g in self.sessions])
+
+# ─── Input Recording & Replay ────────────────────────────────────────────────
+# Frame times are int64 game-clock ms, like the start time, since a cabinet
+# session can run past the 49.7 days a uint32 holds.
+REPLAY_MAGIC   = b"JJR2"
+REPLAY_HEADER  = struct.Struct("<4sQq")    # magic, rng seed, start ms
+REPLAY_FRAME   = struct.Struct("<qBhhB")   # now, arrow keys, mouse x/y, flags
+REPLAY_DIGEST  = struct.Struct("<I")       # follows frames flagged DIGEST
+REPLAY_KEYS    = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN)
+FLAG_THROW, FLAG_ENTER, FLAG_DIGEST, FLAG_COARSE, FLAG_ARRAYS = 1, 2, 4, 8, 16
+
+def state_digest(game):
+    """CRC32 of the gameplay state, to check a replay stays in lockstep."""
+    player = game.player
+    crc = zlib.crc32(struct.pack("<iBBBB", game.delivered, game.game_over,
+                                 player.carrying, player.has_boomerang,
+                                 game.boss is not None))
+    for s in game.all_sprites:
+        crc = zlib.crc32(struct.pack("<4i", *s.rect), crc)
+    return crc
+
+class InputRecorder:
+    """Writes the session's seed and then one fixed-size record per
+    gameplay frame, with a state digest every REPLAY_DIGEST_INTERVAL frames."""
+    def __init__(self, path, game):
+        self.fh     = open(path, "wb")
+        self.game   = game
+        self.frames = 0
+        self.fh.write(REPLAY_HEADER.pack(REPLAY_MAGIC, game.seed, game.ticks()))
+
+    def record(self, now, keys, aim, throw, enter):
+        """Call after update() so the digest covers the frame's result."""
+        self.frames += 1
+        bits   = sum(1 << i for i, k in enumerate(REPLAY_KEYS) if keys[k])
+        digest = self.frames % REPLAY_DIGEST_INTERVAL == 0
+        flags  = (FLAG_THROW*bool(throw) | FLAG_ENTER*bool(enter)
+                  | FLAG_DIGEST*digest | FLAG_COARSE*self.game.collisions.coarse
+                  | FLAG_ARRAYS*(self.game.enemy_arrays is not None))
+        self.fh.write(REPLAY_FRAME.pack(now, bits, *aim, flags))
+        if digest:
+            self.fh.write(REPLAY_DIGEST.pack(state_digest(self.game)))
+
+    def close(self):
+        self.fh.close()
+
+def read_replay(path):
+    """Returns (seed, start, frames); each frame is
+    (now, keys, aim, throw, enter, coarse collisions, NumPy enemies,
+    digest or None)."""
+    with open(path, "rb") as fh:
+        data = fh.read()
+    magic, seed, start = REPLAY_HEADER.unpack_from(data)
+    if magic != REPLAY_MAGIC:
+        raise ValueError(f"{path} is not a replay file, or is from an older version")
+    frames, off = [], REPLAY_HEADER.size
+    while off < len(data):
+        now, bits, mx, my, flags = REPLAY_FRAME.unpack_from(data, off)
+        off += REPLAY_FRAME.size
+        digest = None
+        if flags & FLAG_DIGEST:
+            digest, = REPLAY_DIGEST.unpack_from(data, off)
+            off += REPLAY_DIGEST.size
+        keys = collections.defaultdict(bool)
+        for i, k in enumerate(REPLAY_KEYS):
+            keys[k] = bool(bits >> i & 1)
+        frames.append((now, keys, (mx, my), bool(flags & FLAG_THROW),
+                       bool(flags & FLAG_ENTER), bool(flags & FLAG_COARSE),
+                       bool(flags & FLAG_ARRAYS),
+                       digest))
+    return seed, start, frames
+
+def run_replay(path, game):
+    """Re-run a recording headless on `game`, which is switched to a
+    SimClock, reseeded from the file and set to the enemy backend the
+    recording used.
+
+    Returns (frames run, index of the first frame whose digest diverged or
+    None, wall seconds spent in update()).
+    """
+    seed, start, frames = read_replay(path)
+    game.clock = SimClock(start)
+    game.reset(seed)
+    spent = 0.0
+    for i, (now, keys, aim, throw, enter, coarse, arrays, digest) in enumerate(frames):
+        game.clock.now = now
+        game.collisions.coarse = coarse
+        if arrays != (game.enemy_arrays is not None):
+            if arrays and np is None:
+                raise ValueError(f"{path} was recorded with NumPy enemies; "
+                                 "install NumPy to replay it")
+            game.enemy_arrays = EnemyArrays(game) if arrays else None
+        t = time.perf_counter()
+        if enter and game.game_over:
+            game.reset()
+        game.update(now, keys, aim, throw)
+        spent += time.perf_counter() - t
+        if digest is not None and digest != state_digest(game):
+            return i+1, i, spent
+    return len(frames), None, spent
+
+# ─── Snapshots ───────────────────────────────────────────────────────────────
+# A snapshot is the header, the RNG and flow-field routes, then one record
+# per sprite in draw order (a kind code and rect center, then that kind's
+# fields), one per live timer, and, with the NumPy backend, enemy positions.
+# Sprites refer to each other by draw-order index; images by their index in
+# part_textures. Timestamps are int64 game-clock ms, as the clock runs on
+# across games for as long as a cabinet is up; NO_TIME stands in for an
+# unset one.
+SNAPSHOT_MAGIC   = b"JJS2"
+SNAPSHOT_HEADER  = struct.Struct("<4sQdiBqqqHHbQqHHh")
+SNAPSHOT_RNG     = struct.Struct("<625I?d")   # Mersenne Twister words, gauss
+SNAPSHOT_FLOW    = struct.Struct(f"<{FLOW_COLS*FLOW_ROWS}h")
+SNAPSHOT_ENTITY  = struct.Struct("<Bhh")      # kind, center
+SNAPSHOT_TIMER   = struct.Struct("<qQiBh")    # due, seq, interval, call, owner
+SNAPSHOT_FIELDS  = {
+    Player:              struct.Struct("<??dq"),    # carrying, boomerang, boost
+    Part:                struct.Struct("<bh"),      # image, forbidden thief
+    Thief:               struct.Struct("<dd?bqq"),  # heading, loot, drop, cooldown
+    Chair:               struct.Struct("<q"),       # spawn time
+    BoomerangProjectile: struct.Struct("<HH"),      # step, path points
+    SuperBoomer:         struct.Struct("<bddBqhh"), # health, sprint, state, moved
+}
+SNAPSHOT_KINDS   = (Player, Cashier, Part, Enemy, Thief, Chair, BoomerangItem,
+                    BoomerangProjectile, SpeedBoostItem, SuperBoomer)
+SNAPSHOT_CALLS   = ("drop_chairs", "spawn_boomerang", "spawn_speed_boost",
+                    "spawn_boss", "respawn_enemy", "end_boost", "drop_part",
+                    "throw_chair", "walk", "charge", "sprint")
+# the attribute that holds the Timer for each method that keeps a handle
+SNAPSHOT_HANDLES = {"end_boost": "boost_timer", "throw_chair": "chair_timer",
+                    "walk": "state_timer", "charge": "state_timer",
+                    "sprint": "state_timer"}
+BOSS_STATES      = ("walking", "charging", "sprinting")
+NO_TIME          = -2**63
+FLAG_GAME_OVER, FLAG_ENEMY_POS, FLAG_ROUTES_STALE = 1, 2, 4
+
+KIND_CODES = {cls: i for i, cls in enumerate(SNAPSHOT_KINDS)}
+CALL_CODES = {name: i for i, name in enumerate(SNAPSHOT_CALLS)}
+
+def image_code(image):
+    return -1 if image is None else part_textures.index(image)
+
+def code_image(code):
+    return None if code < 0 else part_textures[code]
+
+def snapshot_state(game):
+    """The whole gameplay state of `game` as bytes, for restore_state().
+
+    Covers the clock, score, RNG, every sprite with its links and timers,
+    the scheduler queue and the flow-field routes; caches that are rebuilt
+    on demand (collision grids, spawn occupancy) are left out.
+    """
+    sprites = game.all_sprites.sprites()
+    ids     = {s: i for i, s in enumerate(sprites)}
+    fields  = SNAPSHOT_FIELDS
+    out     = [b""]
+    _, words, gauss = game.rng.getstate()
+    out.append(SNAPSHOT_RNG.pack(*words, gauss is not None, gauss or 0.0))
+    out.append(SNAPSHOT_FLOW.pack(*game.flow.next))
+
+    for s in sprites:
+        kind = type(s)
+        out.append(SNAPSHOT_ENTITY.pack(KIND_CODES[kind], *s.rect.center))
+        if kind is Part:
+            out.append(fields[Part].pack(image_code(s.image),
+                                         ids.get(s.forbidden_thief, -1)))
+        elif kind is Chair:
+            out.append(fields[Chair].pack(s.spawn_time))
+        elif kind is Thief:
+            out.append(fields[Thief].pack(
+                s.dir_x, s.dir_y, s.carrying, image_code(s.carried_image),
+                NO_TIME if s.drop_time is None else s.drop_time, s.cooldown_until))
+        elif kind is Player:
+            out.append(fields[Player].pack(s.carrying, s.has_boomerang,
+                                           s.speed_multiplier, s.boost_end_time))
+        elif kind is BoomerangProjectile:
+            out.append(fields[kind].pack(s.step, len(s.path)))
+            out.append(struct.pack(f"<{2*len(s.path)}h",
+                                   *itertools.chain.from_iterable(s.path)))
+        elif kind is SuperBoomer:
+            out.append(fields[kind].pack(s.health, *s.sprint_dir,
+                                         BOSS_STATES.index(s.state),
+                                         s.state_start, *s.moved_from))
+
+    timers = [t for _, _, t in game.scheduler.heap if not t.cancelled]
+    seqs   = {t: seq for _, seq, t in game.scheduler.heap}
+    for t in timers:
+        owner = t.fn.__self__
+        out.append(SNAPSHOT_TIMER.pack(
+            t.due, seqs[t], -1 if t.interval is None else t.interval,
+            CALL_CODES[t.fn.__name__], -1 if owner is game else ids[owner]))
+
+    flags = FLAG_GAME_OVER * game.game_over
+    key   = game.flow.key
+    if key and key[1:] != (game.chairs, game.chairs.version):
+        # chairs changed since the routes were found; they'll be redone
+        flags |= FLAG_ROUTES_STALE
+    if game.enemy_arrays:
+        game.enemy_arrays.sync_members()
+        out.append(game.enemy_arrays.pos.tobytes())
+        flags |= FLAG_ENEMY_POS
+
+    delay     = game.delay_event or {}
+    paused_at = game.scheduler.paused_at
+    out[0] = SNAPSHOT_HEADER.pack(
+        SNAPSHOT_MAGIC, game.seed, game.clock.now, game.delivered, flags,
+        delay.get("start_time", NO_TIME), delay.get("next_available_time", NO_TIME),
+        NO_TIME if game.boss_warning_start is None else game.boss_warning_start,
+        game.bosses_spawned, game.boss_kills, image_code(game.current_carried_img),
+        game.scheduler.seq, NO_TIME if paused_at is None else paused_at,
+        len(sprites), len(timers), key[0] if key else -1)
+    return b"".join(out)
+
+def restore_state(game, data):
+    """Put `game` back in the state snapshot_state() captured in `data`.
+    Sprites are rebuilt from the session's pools, so restoring again and
+    again doesn't allocate."""
+    (magic, seed, now, delivered, flags, delay_start, delay_next, warning,
+     bosses, kills, carried, seq, paused_at, n_sprites, n_timers,
+     goal) = SNAPSHOT_HEADER.unpack_from(data)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("not a game snapshot")
+    off = SNAPSHOT_HEADER.size
+    rng = SNAPSHOT_RNG.unpack_from(data, off)
+    off += SNAPSHOT_RNG.size
+    routes = list(SNAPSHOT_FLOW.unpack_from(data, off))
+    off += SNAPSHOT_FLOW.size
+
+    game.seed                = seed
+    game.clock.now           = now
+    game.delivered           = delivered
+    game.game_over           = bool(flags & FLAG_GAME_OVER)
+    game.delay_event         = None if delay_start == NO_TIME else {
+        'start_time': delay_start, 'next_available_time': delay_next}
+    game.boss_warning_start  = None if warning == NO_TIME else warning
+    game.bosses_spawned      = bosses
+    game.boss_kills          = kills
+    game.current_carried_img = code_image(carried)
+    game.boss                = None
+    game.empty_groups()
+
+    fields  = SNAPSHOT_FIELDS
+    sprites = []
+    links   = []
+    for _ in range(n_sprites):
+        kind, cx, cy = SNAPSHOT_ENTITY.unpack_from(data, off)
+        off += SNAPSHOT_ENTITY.size
+        kind = SNAPSHOT_KINDS[kind]
+        f    = fields.get(kind)
+        if f:
+            values = f.unpack_from(data, off)
+            off   += f.size
+        if kind is Part:
+            s = game.spawn("parts", (cx, cy), code_image(values[0]))
+            links.append((s, values[1]))
+        elif kind is Enemy:
+            s = game.spawn("enemies", (cx, cy))
+        elif kind is Chair:
+            s = game.spawn("chairs", (cx, cy))
+            s.spawn_time, = values
+        elif kind is Thief:
+            s = Thief(game, (cx, cy))
+            s.dir_x, s.dir_y, s.carrying, image, drop, s.cooldown_until = values
+            s.carried_image = code_image(image)
+            s.drop_time     = None if drop == NO_TIME else drop
+            game.thieves.add(s); game.all_sprites.add(s)
+        elif kind is Player:
+            s = game.player
+            s.carrying, s.has_boomerang, s.speed_multiplier, s.boost_end_time = values
+            s.boost_timer = None
+            s.rect.center = (cx, cy)
+            game.all_sprites.add(s)
+        elif kind is Cashier:
+            s = game.cashier
+            game.all_sprites.add(s)
+        elif kind is BoomerangProjectile:
+            s = game.spawn("boomerang_projectiles", (cx, cy), (cx, cy))
+            step, points = values
+            flat   = struct.unpack_from(f"<{2*points}h", data, off)
+            off   += 4*points
+            s.path = list(zip(flat[::2], flat[1::2]))
+            s.step = step
+        elif kind is SuperBoomer:
+            s = game.boss = SuperBoomer(game)
+            s.rect.center = (cx, cy)
+            s.health, dx, dy, state, s.state_start, mx, my = values
+            s.sprint_dir = (dx, dy)
+            s.state      = BOSS_STATES[state]
+            s.moved_from = (mx, my)
+            game.all_sprites.add(s)
+        else:
+            s = kind((cx, cy))
+            group = game.boomerangs if kind is BoomerangItem else game.speed_items
+            group.add(s); game.all_sprites.add(s)
+        sprites.append(s)
+    for part, thief in links:
+        part.forbidden_thief = sprites[thief] if thief >= 0 else None
+
+    scheduler = game.scheduler
+    scheduler.clear()
+    heap = scheduler.heap
+    for _ in range(n_timers):
+        due, tseq, interval, call, owner = SNAPSHOT_TIMER.unpack_from(data, off)
+        off   += SNAPSHOT_TIMER.size
+        name   = SNAPSHOT_CALLS[call]
+        owner  = game if owner < 0 else sprites[owner]
+        timer  = Timer(due, getattr(owner, name), None if interval < 0 else interval)
+        heap.append((due, tseq, timer))
+        if name in SNAPSHOT_HANDLES:
+            setattr(owner, SNAPSHOT_HANDLES[name], timer)
+    heapq.heapify(heap)
+    scheduler.seq       = seq
+    scheduler.paused_at = None if paused_at == NO_TIME else paused_at
+
+    flow          = game.flow
+    flow.next     = routes
+    flow.key      = None if goal < 0 else (goal, game.chairs, game.chairs.version
+                                           - bool(flags & FLAG_ROUTES_STALE))
+    flow._targets = None
+    game.collisions.begin()
+    game.placement.invalidate()
+    if game.enemy_arrays:
+        arrays         = game.enemy_arrays
+        arrays.sprites = []
+        if flags & FLAG_ENEMY_POS:
+            arrays.sprites = game.enemies.sprites()
+            arrays.pos     = np.frombuffer(data, float, 2*len(arrays.sprites),
+                                           off).reshape(-1, 2).copy()
+            arrays.vel     = np.zeros_like(arrays.pos)
+    # last, since building thieves and the boss draws from it
+    game.rng.setstate((3, rng[:625], rng[626] if rng[625] else None))
+
+# ─── Main Loop ────────────────────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description="Jalopy Jungle Junkyard Run")
+    parser.add_argument("--headless", action="store_true",
+                        help="simulate without a window (see --minutes)")
+    parser.add_argument("--minutes", type=float, default=60,
+                        help="simulated minutes to run in headless mode")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="only redraw changed screen regions")
+    parser.add_argument("--numpy-enemies", action="store_true",
+                        help="steer enemies with the vectorized NumPy backend")
+    parser.add_argument("--seed", type=int,
+                        help="seed for gameplay randomness")
+    parser.add_argument("--render-fps", type=int, default=RENDER_FPS,
+                        help="cap on rendered frames per second (0: none); "
+                             f"the simulation always ticks at {TICK_RATE} Hz")
+    parser.add_argument("--fixed-quality", action="store_true",
+                        help="keep full quality instead of shedding cost "
+                             "when frames run over budget")
+    parser.add_argument("--max-catchup", type=int, default=MAX_CATCHUP_TICKS,
+                        help="simulation ticks a slow frame may run to catch "
+                             "up before the game slows down instead")
+    parser.add_argument("--record", metavar="PATH",
+                        help="record the session's input to PATH")
+    parser.add_argument("--replay", metavar="PATH",
+                        help="re-run a recorded session headless and verify it")
+    parser.add_argument("--build-assets", action="store_true",
+                        help=f"write the asset bundle to {ASSET_BUNDLE_PATH} "
+                             "and exit")
+    parser.add_argument("--profile", metavar="PATH", nargs="?",
+                        const=PROFILE_DUMP_PATH,
+                        help="record per-phase frame timings and write them "
+                             "to PATH (.csv or .json) on exit")
+    args = parser.parse_args()
+    if args.numpy_enemies and np is None:
+        parser.error("--numpy-enemies needs NumPy installed")
+
+    # the crawl plays while load_assets() runs on its thread
+    if not (args.build_assets or args.replay or args.headless):
+        run_intro(args.render_fps)
+    wait_for_assets()
+
+    if args.build_assets:
+        size = write_asset_bundle()
+        print(f"wrote {ASSET_BUNDLE_PATH} ({size/1024:.0f} KiB)")
+        return
+
+    game = GameSession(args.seed)
+    if args.numpy_enemies:
+        game.enemy_arrays = EnemyArrays(game)
+
+    profiler.enabled = args.profile is not None
+    dump_path        = args.profile or PROFILE_DUMP_PATH
+
+    if args.replay:
+        frames, diverged, spent = run_replay(args.replay, game)
+        print(f"replayed {frames} frames in {spent:.2f}s "
+              f"({spent/max(frames, 1)*1e3:.3f} ms/frame), score {game.delivered}: "
+              + ("in sync" if diverged is None
+                 else f"DIVERGED at frame {diverged}"))
+        if args.profile:
+            profiler.dump(dump_path)
+        sys.exit(diverged is not None)
+
+    if args.headless:
+        start  = pygame.time.get_ticks()
+        scores = run_headless(game, args.minutes * 60000, restart=True)
+        wall   = (pygame.time.get_ticks() - start) / 1000
+        print(f"simulated {args.minutes:g} min in {wall:.1f}s: "
+              f"{len(scores)} games, best {max(scores)}, "
+              f"mean {sum(scores)/len(scores):.1f}")
+        if args.profile:
+            profiler.dump(dump_path)
+        return
+
+    renderer = DirtyRectRenderer() if args.dirty_rects else None
+
+    recorder = InputRecorder(args.record, game) if args.record else None
+    interp   = Interpolator()
+    lag      = 0.0
+    throw = enter = False
+    practice = None   # F5 saves the game here, F9 jumps back to it
+
+    while True:
+        dt = clock.tick(args.render_fps)
+        if not args.fixed_quality:
+            governor.feed(clock.get_rawtime(), game.ticks())
+            game.collisions.coarse = governor.coarse_collisions
+        profiler.begin_frame()
+
+        for ev in pygame.event.get():
+            if ev.type == pygame.QUIT:
+                if args.profile:
+                    profiler.dump(dump_path)
+                if recorder:
+                    recorder.close()
+                pygame.quit(); sys.exit()
+            if ev.type == pygame.KEYDOWN:
+                if ev.key == pygame.K_RETURN:
+                    enter = True
+                if ev.key == pygame.K_SPACE:
+                    throw = True
+                if ev.key == pygame.K_F3:
+                    profiler.toggle_overlay()
+                    if renderer:
+                        renderer.invalidate()
+                if ev.key == pygame.K_F4:
+                    profiler.dump(dump_path)
+                if ev.key == pygame.K_F5:
+                    practice = snapshot_state(game)
+                # a recording can't follow a jump, so it's off while recording
+                if ev.key == pygame.K_F9 and practice and not recorder:
+                    restore_state(game, practice)
+                    interp.capture(game)
+                    if renderer:
+                        renderer.invalidate()
+
+        # run whole ticks for the real time that has passed; past the
+        # catch-up cap the backlog is dropped and the game slows down
+        lag   = min(lag + dt, args.max_catchup * TICK_MS)
+        steps = int(lag // TICK_MS)
+        lag  -= steps * TICK_MS
+        keys, aim = pygame.key.get_pressed(), pygame.mouse.get_pos()
+        profiler.lap("events")
+        for i in range(steps):
+            if i == steps-1:
+                interp.capture(game)
+            now = game.clock.advance(TICK_MS)
+            if enter and game.game_over:
+                game.reset()
+            game.update(now, keys, aim, throw)
+            if recorder:
+                recorder.record(now, keys, aim, throw, enter)
+            throw = enter = False
+
+        if governor.should_render():
+            now = game.ticks()
+            interp.apply(game, lag / TICK_MS)
+            if renderer:
+                renderer.present(game, now)
+            else:
+                render(game, now)
+                pygame.display.flip()
+            interp.restore()
+        profiler.lap("render")
+        profiler.end_frame(game)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""Long-session soak test: memory and frame-time drift over many deliveries.
+
+Drives one GameSession with the scripted bot until --deliveries parts have
+been delivered, restarting after each game over the way a cabinet would
+(or, with --immortal, keeping a single game going so its enemies, thieves
+and chairs pile up). A bot that goes STALL_MS of simulated time without a
+delivery is wedged: a normal run restarts the game and counts it, while an
+immortal run stops there, since a restart would throw the pile away; the
+samples taken so far are still checked, and the exit status is 2. Every --every deliveries it samples process RSS, the
+tracemalloc heap and its top growing allocation sites, the live entities
+per group and pool, and update/render frame-time percentiles since the
+last sample. Heap tracing is opt-in (--tracemalloc): it slows the run
+several times over and inflates the frame times with it.
+
+Least-squares slopes per 1000 deliveries are fitted over the samples after
+--warmup; the exit status is non-zero when heap, RSS or p99 frame time
+grows faster than the configured limits.
+
+Run from the repository root:
+    python soak.py --deliveries 10000 --out soak.jsonl
+    python soak.py --deliveries 2000 --tracemalloc
+    python soak.py --immortal --deliveries 500 --every 25
+"""
+import argparse
+import gc
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import game
+
+DELIVERIES   = 10000
+EVERY        = 250       # deliveries between samples
+WARMUP       = 2         # samples left out of the slope fit
+RENDER_EVERY = 4         # render one frame in N (0 = never)
+STALL_MS     = 2 * 60000   # simulated ms without a delivery: the bot is wedged
+TOP          = 5         # allocation sites reported per sample
+GROUPS       = ("enemies", "thieves", "chairs", "parts", "boomerangs",
+                "boomerang_projectiles", "speed_items", "all_sprites")
+PERCENTILES  = (50, 99)
+
+# fail limits, per 1000 deliveries
+MAX_HEAP_SLOPE = 0.5     # MB of traced heap
+MAX_RSS_SLOPE  = 2.0     # MB of resident memory
+MAX_P99_SLOPE  = 0.25    # ms of p99 update or render time
+
+
+def rss_mb():
+    """Resident set size; peak RSS where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as fh:
+            pages = int(fh.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (2**20 if sys.platform == "darwin" else 2**10)
+
+
+def percentiles(values):
+    values = sorted(values)
+    if not values:
+        return {f"p{q}": None for q in PERCENTILES}
+    return {f"p{q}": values[min(len(values)-1, len(values)*q // 100)]
+            for q in PERCENTILES}
+
+
+def slope(xs, ys):
+    """Least-squares slope of ys over xs; None with fewer than 2 points."""
+    points = [(x, y) for x, y in zip(xs, ys) if y is not None]
+    if len(points) < 2:
+        return None
+    n  = len(points)
+    mx = sum(x for x, _ in points) / n
+    my = sum(y for _, y in points) / n
+    vx = sum((x-mx)**2 for x, _ in points)
+    return sum((x-mx)*(y-my) for x, y in points) / vx if vx else None
+
+
+class Soak:
+    """Steps the session and keeps the running totals between samples."""
+    def __init__(self, seed, immortal, render_every, trace):
+        self.world        = game.GameSession(seed)
+        self.immortal     = immortal
+        self.render_every = render_every
+        self.trace        = trace
+        self.delivered    = 0
+        self.seen         = 0
+        self.games        = 1
+        self.restarts     = 0
+        self.stalled      = False
+        self.frames       = 0
+        self.last_at      = self.world.ticks()
+        self.update_ms    = []
+        self.render_ms    = []
+        self.baseline     = None
+        if trace:
+            tracemalloc.start()
+            self.baseline = self.snapshot()
+
+    @staticmethod
+    def snapshot():
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ))
+
+    def restart(self):
+        self.world.reset()
+        self.seen     = 0
+        self.games   += 1
+        self.last_at  = self.world.ticks()
+
+    def step(self):
+        world = self.world
+        now   = world.clock.advance(game.TICK_MS)
+        keys, aim, throw = game.bot_policy(world, now)
+        start = time.perf_counter()
+        world.update(now, keys, aim, throw)
+        self.update_ms.append((time.perf_counter() - start) * 1000)
+        self.frames += 1
+        if self.render_every and self.frames % self.render_every == 0:
+            start = time.perf_counter()
+            game.render(world, now)
+            self.render_ms.append((time.perf_counter() - start) * 1000)
+
+        if world.delivered > self.seen:
+            self.delivered += world.delivered - self.seen
+            self.seen       = world.delivered
+            self.last_at    = now
+        if self.immortal:
+            world.game_over = False
+        if world.game_over:
+            self.restart()
+        elif now - self.last_at > STALL_MS:
+            # the bot is wedged (walled in by chairs, say); start over,
+            # unless this game is the one meant to pile up
+            if self.immortal:
+                self.stalled = True
+            else:
+                self.restarts += 1
+                self.restart()
+
+    def sample(self, wall_s):
+        """One row of measurements; clears the frame-time window."""
+        world = self.world
+        gc.collect()
+        row = {
+            "deliveries": self.delivered,
+            "games":      self.games,
+            "restarts":   self.restarts,
+            "sim_min":    world.ticks() / 60000,
+            "wall_s":     wall_s,
+            "rss_mb":     rss_mb(),
+            "gc_objects": len(gc.get_objects()),
+            "entities":   {name: len(getattr(world, name)) for name in GROUPS},
+            "pooled":     {name: pool.stats()["size"]
+                           for name, pool in world.pools.items()},
+            "update":     percentiles(self.update_ms),
+            "render":     percentiles(self.render_ms),
+        }
+        if self.trace:
+            snap = self.snapshot()
+            row["heap_mb"] = sum(s.size for s in snap.statistics("filename")) / 2**20
+            row["top"] = [f"{s.traceback[0].filename}:{s.traceback[0].lineno} "
+                          f"{s.size_diff / 1024:+.1f} KiB"
+                          for s in snap.compare_to(self.baseline, "lineno")[:TOP]
+                          if s.size_diff > 0]
+        self.update_ms.clear()
+        self.render_ms.clear()
+        return row
+
+
+def check(rows, warmup, limits):
+    """Fitted slopes per 1000 deliveries and the names that exceed limits."""
+    rows   = rows[warmup:]
+    xs     = [r["deliveries"] / 1000 for r in rows]
+    series = {
+        "heap_mb":    [r.get("heap_mb") for r in rows],
+        "rss_mb":     [r["rss_mb"] for r in rows],
+        "update_p99": [r["update"]["p99"] for r in rows],
+        "render_p99": [r["render"]["p99"] for r in rows],
+    }
+    slopes = {name: slope(xs, ys) for name, ys in series.items()}
+    failed = [name for name, s in slopes.items()
+              if s is not None and s > limits[name]]
+    return slopes, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--deliveries", type=int, default=DELIVERIES)
+    parser.add_argument("--every", type=int, default=EVERY,
+                        help="deliveries between samples")
+    parser.add_argument("--warmup", type=int, default=WARMUP,
+                        help="early samples left out of the slope fit")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--immortal", action="store_true",
+                        help="never end the game, so entities accumulate; "
+                             "stops early if the bot gets wedged")
+    parser.add_argument("--render-every", type=int, default=RENDER_EVERY,
+                        help="render one frame in N for render timings (0 = never)")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="trace the heap and its top growing allocation "
+                             "sites (several times slower)")
+    parser.add_argument("--max-heap-slope", type=float, default=MAX_HEAP_SLOPE,
+                        help="MB of traced heap per 1000 deliveries")
+    parser.add_argument("--max-rss-slope", type=float, default=MAX_RSS_SLOPE,
+                        help="MB of RSS per 1000 deliveries")
+    parser.add_argument("--max-p99-slope", type=float, default=MAX_P99_SLOPE,
+                        help="ms of p99 update or render time per 1000 deliveries")
+    parser.add_argument("--out", help="append samples to this JSONL file")
+    args = parser.parse_args()
+    limits = {"heap_mb": args.max_heap_slope, "rss_mb": args.max_rss_slope,
+              "update_p99": args.max_p99_slope, "render_p99": args.max_p99_slope}
+
+    soak  = Soak(args.seed, args.immortal, args.render_every, args.tracemalloc)
+    out   = open(args.out, "a") if args.out else None
+    rows  = []
+    start = time.perf_counter()
+    if out:
+        out.write(json.dumps({"args": vars(args)}) + "\n")
+    next_sample = args.every
+    while soak.delivered < args.deliveries and not soak.stalled:
+        soak.step()
+        if soak.delivered >= next_sample:
+            next_sample += args.every
+            row = soak.sample(time.perf_counter() - start)
+            rows.append(row)
+            if out:
+                out.write(json.dumps(row) + "\n")
+                out.flush()
+            heap = f"heap {row['heap_mb']:7.2f} MB  " if "heap_mb" in row else ""
+            print(f"{row['deliveries']:>7} deliveries  {row['games']:>6} games  "
+                  f"rss {row['rss_mb']:7.1f} MB  {heap}"
+                  f"update p99 {row['update']['p99']:6.3f} ms  "
+                  f"enemies {row['entities']['enemies']:>5}  "
+                  f"chairs {row['entities']['chairs']:>5}", file=sys.stderr)
+            for site in row.get("top", []):
+                print(f"{'':>10}{site}", file=sys.stderr)
+
+    slopes, failed = check(rows, args.warmup, limits)
+    print(f"\n{'per 1000 deliveries':<20}{'slope':>10}{'limit':>10}", file=sys.stderr)
+    for name, s in slopes.items():
+        shown = "n/a" if s is None else f"{s:.3f}"
+        flag  = "  FAILED" if name in failed else ""
+        print(f"{name:<20}{shown:>10}{limits[name]:>10.3f}{flag}", file=sys.stderr)
+    if out:
+        out.write(json.dumps({"slopes": slopes, "failed": failed,
+                              "stalled": soak.stalled}) + "\n")
+        out.close()
+    if soak.stalled:
+        print(f"stopped: the bot made no delivery for {STALL_MS/60000:g} "
+              f"simulated minutes after {soak.delivered} deliveries, and an "
+              f"immortal game isn't restarted", file=sys.stderr)
+        sys.exit(2)
+    if failed:
+        print("drift:", ", ".join(failed), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
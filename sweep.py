@@ -0,0 +1,211 @@
+"""Monte Carlo balance sweeps over the tuning constants in game.py.
+
+Expands a grid or random-search spec into configurations, plays many
+headless games per configuration with the scripted bot across a process
+pool, and aggregates survival time, deliveries and boss kill rate.
+
+Spec files are JSON, either a full grid:
+    {"grid": {"ENEMY_SPEED": [1, 2, 3], "BOSS_HIT_POINTS": [3, 5, 8]}}
+or uniform random samples over [low, high] ranges (ints stay ints):
+    {"random": {"ENEMY_SPEED": [1, 4], "LINE_PROBABILITY": [0.0, 0.3]},
+     "samples": 50}
+
+Every finished chunk of games is appended to the --out checkpoint file, so
+an interrupted sweep picks up where it stopped when re-run with the same
+arguments. Game seeds depend only on the game index, so every
+configuration is played on the same set of worlds.
+
+Run from the repository root:
+    python sweep.py spec.json --games 200 --out sweep.jsonl
+"""
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import signal
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import game
+
+GAMES   = 100
+MINUTES = 5      # simulated cap per game
+CHUNK   = 10     # games per pool task and per checkpoint line
+
+# numeric constants that game.py reads once, at import or as default
+# arguments, or derives others from there; setting them in a worker
+# afterwards would be ignored or leave the game inconsistent
+FROZEN = {"WIDTH", "HEIGHT", "TICK_RATE", "TICK_MS", "FLOW_CELL", "FLOW_COLS",
+          "FLOW_ROWS", "QUALITY_BUDGET_MS", "PROFILE_HISTORY",
+          "DIRTY_FULL_REDRAW_FRACTION", "ATLAS_WIDTH"}
+
+
+def expand(spec, seed):
+    """List of {constant: value} configurations described by `spec`."""
+    if "grid" in spec:
+        names = list(spec["grid"])
+        return [dict(zip(names, values))
+                for values in itertools.product(*spec["grid"].values())]
+    rnd = random.Random(seed)
+    configs = []
+    for _ in range(spec["samples"]):
+        params = {}
+        for name, (low, high) in spec["random"].items():
+            if isinstance(low, int) and isinstance(high, int):
+                params[name] = rnd.randint(low, high)
+            else:
+                params[name] = rnd.uniform(low, high)
+        configs.append(params)
+    return configs
+
+
+def game_seed(seed, index):
+    return random.Random(f"{seed}:{index}").randrange(2**63)
+
+
+_defaults = {}
+
+def init_worker():
+    # SDL traps SIGINT/SIGTERM to post QUIT events; workers should leave
+    # Ctrl-C to the parent and die on terminate()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+
+def run_chunk(task):
+    """Play games [first, first+count) under `params`; one row per game of
+    (survival ms, deliveries, bosses spawned, bosses killed)."""
+    config, params, first, count, seed, cap_ms = task
+    if not _defaults:
+        _defaults.update((k, v) for k, v in vars(game).items() if k.isupper())
+    for name, value in {**_defaults, **params}.items():
+        setattr(game, name, value)
+
+    rows = []
+    for i in range(first, first + count):
+        session = game.GameSession(game_seed(seed, i))
+        game.run_headless(session, cap_ms)
+        rows.append((session.ticks(), session.delivered,
+                     session.bosses_spawned, session.boss_kills))
+    return config, first, rows
+
+
+def load_checkpoint(path, header):
+    """Completed (config, first game) -> rows from an earlier run of the
+    same sweep; a torn last line from a crash is dropped."""
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, "rb+") as fh:
+        data = fh.read()
+        end  = data.rfind(b"\n") + 1
+        fh.truncate(end)
+    lines = data[:end].decode().splitlines()
+    if lines and json.loads(lines[0]) != header:
+        raise SystemExit(f"{path} holds a different sweep; pick another --out")
+    for line in lines[1:]:
+        row = json.loads(line)
+        done[row["config"], row["first"]] = row["games"]
+    return done
+
+
+def summarize(configs, done):
+    """Per-configuration means, in config order."""
+    by_config = [[] for _ in configs]
+    for (config, _), rows in done.items():
+        by_config[config].extend(rows)
+    summary = []
+    for config, (params, rows) in enumerate(zip(configs, by_config)):
+        if not rows:
+            continue
+        n      = len(rows)
+        bosses = sum(r[2] for r in rows)
+        summary.append({
+            "config":         config,
+            **params,
+            "games":          n,
+            "survival_s":     sum(r[0] for r in rows) / n / 1000,
+            "deliveries":     sum(r[1] for r in rows) / n,
+            "boss_games":     sum(1 for r in rows if r[2]) / n,
+            "boss_kill_rate": sum(r[3] for r in rows) / bosses if bosses else None,
+        })
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("spec", help="JSON grid or random-search spec")
+    parser.add_argument("--games", type=int, default=GAMES,
+                        help="games per configuration")
+    parser.add_argument("--minutes", type=float, default=MINUTES,
+                        help="simulated minutes before a game is cut off")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--out", default="sweep.jsonl",
+                        help="checkpoint file, appended as chunks finish")
+    parser.add_argument("--summary", help="write per-config results CSV here "
+                                          "(default: --out with .csv)")
+    args = parser.parse_args()
+
+    with open(args.spec) as fh:
+        spec = json.load(fh)
+    configs = expand(spec, args.seed)
+    names   = {name for params in configs for name in params}
+    unknown = {n for n in names if not n.isupper() or not hasattr(game, n)
+               or not isinstance(getattr(game, n), (int, float))}
+    if unknown:
+        parser.error(f"unknown or non-numeric constants: {', '.join(sorted(unknown))}")
+    frozen = names & FROZEN
+    if frozen:
+        parser.error(f"can't sweep {', '.join(sorted(frozen))}: fixed when "
+                     "game.py is imported")
+
+    header = {"configs": configs, "games": args.games,
+              "minutes": args.minutes, "seed": args.seed, "chunk": CHUNK}
+    done   = load_checkpoint(args.out, header)
+    cap_ms = args.minutes * 60000
+    tasks  = [(c, params, first, min(CHUNK, args.games - first), args.seed, cap_ms)
+              for c, params in enumerate(configs)
+              for first in range(0, args.games, CHUNK)
+              if (c, first) not in done]
+    total    = len(configs) * args.games
+    finished = total - sum(t[3] for t in tasks)
+    print(f"{len(configs)} configs x {args.games} games, {finished} already "
+          f"played, {args.workers} workers", file=sys.stderr)
+
+    start    = time.perf_counter()
+    played   = 0
+    with open(args.out, "a") as out, multiprocessing.Pool(args.workers, init_worker) as pool:
+        if out.tell() == 0:
+            out.write(json.dumps(header) + "\n")
+        for config, first, rows in pool.imap_unordered(run_chunk, tasks):
+            out.write(json.dumps({"config": config, "first": first,
+                                  "games": rows}) + "\n")
+            out.flush()
+            done[config, first] = rows
+            played += len(rows)
+            print(f"\r{finished + played:>8}/{total} games  "
+                  f"{played / (time.perf_counter() - start):7.1f} games/s",
+                  end="", file=sys.stderr)
+    print(file=sys.stderr)
+
+    summary = summarize(configs, done)
+    if not summary:
+        raise SystemExit("no games played; nothing to summarize")
+    path    = args.summary or os.path.splitext(args.out)[0] + ".csv"
+    with open(path, "w", newline="") as fh:
+        writer = csv.DictWriter(fh, fieldnames=list(summary[0]))
+        writer.writeheader()
+        writer.writerows(summary)
+    best = max(summary, key=lambda r: r["deliveries"])
+    print(f"wrote {path}; most deliveries: config {best['config']} "
+          f"({best['deliveries']:.2f} per game)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()